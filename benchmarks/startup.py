@@ -0,0 +1,105 @@
+"""
+Startup cost of the API: import time of `src.app.main`, the slowest
+imports, and time until a fresh uvicorn process answers its first request.
+
+    python -m benchmarks.startup [runs]
+
+Each run starts a new interpreter, so nothing is cached between runs
+except the OS page cache and .pyc files. Needs the app's environment
+(.env) and, for time-to-first-request, the database and Redis it points
+at. Set ENVIRONMENT=production to measure the migration-trusting mode.
+"""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_MAIN = (
+    "import time; t = time.perf_counter(); import src.app.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def import_seconds() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_MAIN],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(count: int = 10) -> list:
+    # `-X importtime` lines: "import time: self [us] | cumulative | package"
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.app.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+
+    for line in output.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            timings.append((int(parts[1]), parts[2].rstrip()))
+
+    return sorted(timings, reverse=True)[:count]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_request_seconds(timeout: float = 60) -> float:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/v1/metrics"
+    start = time.perf_counter()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.app.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=os.environ.copy(),
+    )
+
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1):
+                    return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.02)
+
+        raise TimeoutError(f"no response from {url} within {timeout}s")
+
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(runs: int) -> None:
+    imports = [import_seconds() for _ in range(runs)]
+    print(f"import src.app.main    median {statistics.median(imports):.3f}s")
+
+    print("slowest imports (cumulative):")
+
+    for micros, module in slowest_imports():
+        print(f"  {micros / 1000:8.1f} ms {module}")
+
+    first = [first_request_seconds() for _ in range(runs)]
+    print(f"time to first request  median {statistics.median(first):.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,98 @@
+"""
+CPU per query for statements built on every call (as the services used
+to do) against the prebuilt bound-parameter statements they use now.
+
+    python -m benchmarks.statement_cache [iterations]
+
+Runs on in-memory SQLite with the app's models, so the numbers are
+dominated by SQLAlchemy/SQLModel overhead rather than the database. It
+imports the services, so it needs the app's environment (.env).
+"""
+
+import sys
+import time
+import uuid
+from sqlalchemy import create_engine
+from sqlalchemy.orm import raiseload
+from sqlmodel import Session, SQLModel, desc, select
+from src.app.auth.service import LEAN_USER_OPTIONS, USERS_BY_EMAILS
+from src.app.books.service import (
+    BOOKS_BY_UIDS,
+    LATEST_BOOK_REVIEWS,
+    LEAN_BOOK_OPTIONS,
+)
+from src.app.models.models import Book, Review, User
+from src.app.reviews.service import REVIEW_BY_UID
+from src.app.utils.config import Config
+
+EMAIL = "bench@example.com"
+UID = str(uuid.uuid4())
+UIDS = [str(uuid.uuid4()) for _ in range(10)]
+
+# name, statement as built per call before, prebuilt statement, its params
+CASES = [
+    (
+        "users by email",
+        lambda: select(User)
+        .options(*LEAN_USER_OPTIONS)
+        .where(User.email.in_([EMAIL])),
+        USERS_BY_EMAILS,
+        {"emails": [EMAIL]},
+    ),
+    (
+        "books by uids",
+        lambda: select(Book).options(*LEAN_BOOK_OPTIONS).where(Book.uid.in_(UIDS)),
+        BOOKS_BY_UIDS,
+        {"book_uids": UIDS},
+    ),
+    (
+        "latest book reviews",
+        lambda: select(Review)
+        .options(raiseload("*"))
+        .where(Review.book_uid == UID)
+        .order_by(desc(Review.created_at), desc(Review.uid))
+        .limit(Config.BOOK_DETAIL_REVIEWS_LIMIT),
+        LATEST_BOOK_REVIEWS,
+        {"book_uid": UID},
+    ),
+    (
+        "review by uid",
+        lambda: select(Review).where(Review.uid == UID),
+        REVIEW_BY_UID,
+        {"review_uid": UID},
+    ),
+]
+
+
+def cpu_per_query(session: Session, build, params: dict, iterations: int) -> float:
+    start = time.process_time()
+
+    for _ in range(iterations):
+        session.exec(build(), params=params).all()
+
+    return (time.process_time() - start) / iterations
+
+
+def main(iterations: int) -> None:
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+
+    print(f"{'query':<22}{'per call':>12}{'prebuilt':>12}{'speedup':>10}")
+
+    with Session(engine) as session:
+        for name, inline, prebuilt, params in CASES:
+            # warm SQLAlchemy's compiled cache for both shapes first
+            cpu_per_query(session, inline, {}, 10)
+            cpu_per_query(session, lambda: prebuilt, params, 10)
+
+            before = cpu_per_query(session, inline, {}, iterations)
+            after = cpu_per_query(session, lambda: prebuilt, params, iterations)
+
+            print(
+                f"{name:<22}{before * 1e6:>9.1f} us{after * 1e6:>9.1f} us"
+                f"{before / after:>9.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
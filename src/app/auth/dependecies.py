@@ -4,10 +4,16 @@ from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from typing import Optional, List, Any
 from src.app.utils.security import decode_token
-from src.app.db.redis import is_token_in_blocklist
+from src.app.db.redis import is_token_revoked
 from src.app.db.database import get_session
-from src.app.models.models import User
-from src.app.utils.errors import AccountNotVerified, InsufficientPermission
+from src.app.utils.config import Config
+from src.app.utils.metrics import incr
+from src.app.utils.errors import (
+    AccountNotVerified,
+    InsufficientPermission,
+    UserNotFound,
+)
+from .schemas import UserPrincipal
 from .service import UserService
 
 
@@ -22,9 +28,25 @@ class TokenBearer(HTTPBearer):
         creds = await super().__call__(request)
 
         token = creds.credentials
+
+        # several bearers run per request (route, get_current_user, ...):
+        # verify and check the blocklist once, then reuse the claims
+        verified = getattr(request.state, "verified_token", None)
+
+        if verified and verified[0] == token:
+            token_data = verified[1]
+        else:
+            token_data = await self.verify_token(token)
+            request.state.verified_token = (token, token_data)
+
+        self.verify_token_data(token_data)
+
+        return token_data
+
+    async def verify_token(self, token: str) -> dict:
         token_data = decode_token(token)
 
-        if not self.is_token_valid(token):
+        if not token_data:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail={
@@ -33,7 +55,7 @@ class TokenBearer(HTTPBearer):
                 },
             )
 
-        if await is_token_in_blocklist(token_data["jti"]):
+        if await is_token_revoked(token_data):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail={
@@ -42,13 +64,8 @@ class TokenBearer(HTTPBearer):
                 },
             )
 
-        self.verify_token_data(token_data)
-
         return token_data
 
-    def is_token_valid(self, token: str) -> bool:
-        return True if decode_token(token) else False
-
     def verify_token_data(self, token_data: dict):
         raise NotImplementedError("Please override this method in child classes")
 
@@ -78,22 +95,54 @@ class RefreshTokenBearer(TokenBearer):
 async def get_current_user(
     token_details: dict = Depends(AccessTokenBearer()),
     session: AsyncSession = Depends(get_session),
-):
+) -> UserPrincipal:
     user_email = token_details["user"]["email"]
     user_service = UserService()
-    user = await user_service.get_user_by_email(user_email, session)
+    user = await user_service.get_principal(user_email, session)
+
+    if not user:
+        raise UserNotFound()
+
     return user
 
 
 class RoleChecker:
-    def __init__(self, allowed_roles: List[str]) -> None:
+    """
+    With `stateless=True` (meant for read-only routes) and STATELESS_AUTH
+    enabled, a token whose claims carry a role and `is_verified: true` is
+    authorized from the claims alone, without touching the users table.
+    Any other token is checked against the user as loaded by
+    `get_current_user`.
+    """
+
+    def __init__(self, allowed_roles: List[str], stateless: bool = False) -> None:
         self.allowed_roles = allowed_roles
+        self.stateless = stateless
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
-        if not current_user.is_verified:
-            raise AccountNotVerified()
-
-        if current_user.role in self.allowed_roles:
+    async def __call__(
+        self,
+        token_details: dict = Depends(AccessTokenBearer()),
+        session: AsyncSession = Depends(get_session),
+    ) -> Any:
+        claims = token_details["user"]
+
+        if (
+            self.stateless
+            and Config.STATELESS_AUTH
+            and claims.get("is_verified")
+            and "role" in claims
+        ):
+            incr("auth.stateless_checks")
+            role = claims["role"]
+        else:
+            current_user = await get_current_user(token_details, session)
+
+            if not current_user.is_verified:
+                raise AccountNotVerified()
+
+            role = current_user.role
+
+        if role in self.allowed_roles:
             return True
 
         raise InsufficientPermission()
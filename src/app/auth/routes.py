@@ -14,7 +14,8 @@ from .service import UserService
 from src.app.db.database import get_session
 from src.app.utils.security import (
     create_access_token,
-    verify_password,
+    check_password,
+    hash_password,
     create_url_safe_token,
     decode_url_safe_token,
 )
@@ -26,31 +27,49 @@ from .dependecies import (
 )
 from src.app.db.redis import add_jti_to_blocklist
 from src.app.utils.config import Config
+from src.app.utils.rate_limit import RateLimiter, body_field
 from src.app.utils.errors import UserNotFound, UserAlreadyExists
-from src.app.utils.security import generate_password_hash
-from src.app.utils.celery_tasks import send_email
+from src.app.utils.background import send_email_later
 
 
 router = APIRouter()
 user_service = UserService()
 role_checker = RoleChecker(["admin", "user"])
 
+# checked before the body reaches bcrypt or the mail broker
+login_limit = RateLimiter("login", Config.LOGIN_RATE_LIMIT)
+login_email_limit = RateLimiter(
+    "login_email", Config.LOGIN_EMAIL_RATE_LIMIT, key=body_field("email")
+)
+signup_limit = RateLimiter("signup", Config.SIGNUP_RATE_LIMIT)
+send_mail_limit = RateLimiter("send_mail", Config.SEND_MAIL_RATE_LIMIT)
+password_reset_limit = RateLimiter("password_reset", Config.PASSWORD_RESET_RATE_LIMIT)
+password_reset_email_limit = RateLimiter(
+    "password_reset_email",
+    Config.PASSWORD_RESET_EMAIL_RATE_LIMIT,
+    key=body_field("email"),
+)
+
 REFRESH_TOKEN_EXPIRY = 2
 
 
-@router.post("/send_mail")
+@router.post("/send_mail", dependencies=[Depends(send_mail_limit)])
 async def send_mail(emails: EmailModel):
     emails = emails.addresses
 
     html = "<h1>Welcome to the app</h1>"
     subject = "Welcome to our app"
 
-    send_email.delay(emails, subject, html)
+    send_email_later(emails, subject, html)
 
     return {"message": "Email sent successfully"}
 
 
-@router.post("/signup", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/signup",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(signup_limit)],
+)
 async def create_user_Account(
     user_data: CreateUserModel,
     session: AsyncSession = Depends(get_session),
@@ -82,7 +101,7 @@ async def create_user_Account(
 
     subject = "Verify Your email"
 
-    send_email.delay(emails, subject, html)
+    send_email_later(emails, subject, html)
 
     return {
         "message": "Account Created! Check email to verify your account",
@@ -116,7 +135,9 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
     )
 
 
-@router.post("/login")
+@router.post(
+    "/login", dependencies=[Depends(login_limit), Depends(login_email_limit)]
+)
 async def login_users(
     user_login_data: UserLoginModel, session: AsyncSession = Depends(get_session)
 ):
@@ -126,19 +147,25 @@ async def login_users(
     user = await user_service.get_user_by_email(email, session)
 
     if user:
-        password_valid = verify_password(password, user.password_hash)
+        password_valid, new_hash = await check_password(password, user.password_hash)
 
         if password_valid:
-            access_token = create_access_token(
-                user_data={"email": email, "user_uid": str(user.uid), "role": user.role}
-            )
+            if new_hash:
+                await user_service.update_user(
+                    user, {"password_hash": new_hash}, session
+                )
+
+            user_data = {
+                "email": email,
+                "user_uid": str(user.uid),
+                "role": user.role,
+                "is_verified": user.is_verified,
+            }
+
+            access_token = create_access_token(user_data=user_data)
 
             refresh_token = create_access_token(
-                user_data={
-                    "email": email,
-                    "user_uid": str(user.uid),
-                    "role": user.role,
-                },
+                user_data=user_data,
                 refresh=True,
                 expiry=timedelta(days=REFRESH_TOKEN_EXPIRY),
             )
@@ -183,8 +210,12 @@ async def get_new_session(token_details: dict = Depends(RefreshTokenBearer())):
 
 
 @router.get("/me", response_model=UserBooksModel)
-async def current_user(user=Depends(get_current_user), _: bool = Depends(role_checker)):
-    return user
+async def current_user(
+    user=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(role_checker),
+):
+    return await user_service.get_user_books(user.email, session)
 
 
 @router.get("/logout")
@@ -199,7 +230,10 @@ async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
     )
 
 
-@router.post("/password-reset-request")
+@router.post(
+    "/password-reset-request",
+    dependencies=[Depends(password_reset_limit), Depends(password_reset_email_limit)],
+)
 async def password_reset_request(email_data: PasswordResetRequestModel):
     email = email_data.email
 
@@ -213,7 +247,7 @@ async def password_reset_request(email_data: PasswordResetRequestModel):
     """
     subject = "Reset Your Password"
 
-    send_email.delay([email], subject, html_message)
+    send_email_later([email], subject, html_message)
     return JSONResponse(
         content={
             "message": "Please check your email for instructions to reset your password",
@@ -246,7 +280,7 @@ async def reset_account_password(
         if not user:
             raise UserNotFound()
 
-        password_hash = generate_password_hash(new_password)
+        password_hash = await hash_password(new_password)
         await user_service.update_user(user, {"password_hash": password_hash}, session)
 
         return JSONResponse(
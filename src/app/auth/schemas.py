@@ -30,6 +30,16 @@ class UserResponse(BaseModel):
     updated_at: datetime
 
 
+class UserPrincipal(BaseModel):
+    """The authenticated user, as much as authorization needs to know."""
+
+    uid: str
+    email: str
+    username: str
+    role: str
+    is_verified: bool
+
+
 class UserBooksModel(UserResponse):
     books: List[Book]
     reviews: List[ReviewModel]
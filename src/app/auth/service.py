@@ -1,20 +1,97 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from src.app.models.models import User
-from .schemas import CreateUserModel
-from src.app.utils.security import generate_password_hash
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import raiseload, selectinload
+from src.app.models.models import User, Book
+from .schemas import CreateUserModel, UserPrincipal
+from src.app.db.cache import Cache
+from src.app.db.loader import BatchLoader, get_loader
+from src.app.db.redis import revoke_user_tokens
+from src.app.utils.config import Config
+from src.app.utils.errors import UserAlreadyExists
+from src.app.utils.security import hash_password
+
+# Auth paths only need the user's own columns, never their books/reviews.
+LEAN_USER_OPTIONS = (raiseload("*"),)
+
+# `UserBooksModel` embeds books and reviews, but not the books' reviews.
+USER_BOOKS_OPTIONS = (
+    selectinload(User.books).raiseload(Book.reviews),
+    selectinload(User.reviews),
+)
+
+# Built once and executed with bound parameters, so hot lookups skip
+# statement construction and hit SQLAlchemy's compiled cache directly.
+USERS_BY_EMAILS = (
+    select(User)
+    .options(*LEAN_USER_OPTIONS)
+    .where(User.email.in_(bindparam("emails", expanding=True)))
+)
+USER_BOOKS_BY_EMAIL = (
+    select(User).options(*USER_BOOKS_OPTIONS).where(User.email == bindparam("email"))
+)
+
+# `UserPrincipal` keyed by email, read on every authenticated request;
+# invalidated by `update_user`
+principal_cache = Cache(
+    "principal",
+    ttl=Config.PRINCIPAL_CACHE_TTL,
+    local_ttl=Config.PRINCIPAL_LOCAL_TTL,
+)
+
+
+def user_loader(session: AsyncSession) -> BatchLoader:
+    """Request-scoped loader of lean users by email."""
+
+    async def load_many(emails):
+        result = await session.exec(USERS_BY_EMAILS, params={"emails": emails})
+        users = result.all()
+        found = {user.email: user for user in users}
+
+        # MySQL's default collations ignore case, so `A@x` also finds the
+        # row stored as `a@x`; elsewhere the two can be different users
+        if session.get_bind().dialect.name == "mysql":
+            folded = {user.email.lower(): user for user in users}
+
+            return {
+                email: found.get(email) or folded.get(email.lower())
+                for email in emails
+            }
+
+        return found
+
+    return get_loader(session, "users_by_email", load_many)
 
 
 class UserService:
 
     async def get_user_by_email(self, email: str, session: AsyncSession):
-        statement = select(User).where(User.email == email)
+        return await user_loader(session).load(email)
 
-        result = await session.exec(statement)
+    async def get_user_books(self, email: str, session: AsyncSession):
+        result = await session.exec(USER_BOOKS_BY_EMAIL, params={"email": email})
         user = result.first()
 
         return user
 
+    async def get_principal(self, email: str, session: AsyncSession):
+        principal = await principal_cache.get(email)
+
+        if principal is not None:
+            return UserPrincipal.model_validate(principal)
+
+        generation = await principal_cache.generation(email)
+        user = await self.get_user_by_email(email, session)
+
+        if not user:
+            return None
+
+        principal = UserPrincipal.model_validate(user, from_attributes=True)
+        await principal_cache.fill(email, principal.model_dump(), generation)
+
+        return principal
+
     async def is_user_exists(self, email: str, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
 
@@ -25,19 +102,35 @@ class UserService:
 
         new_user = User(**user_data_dict)
 
-        new_user.password_hash = generate_password_hash(user_data_dict["password"])
+        new_user.password_hash = await hash_password(user_data_dict["password"])
         new_user.role = "user"
 
         session.add(new_user)
-        await session.commit()
+
+        try:
+            await session.commit()
+
+        except IntegrityError:
+            # lost a race with a concurrent signup for the same email
+            await session.rollback()
+            raise UserAlreadyExists()
+
+        # the signup check may have remembered this email as missing
+        user_loader(session).clear(new_user.email)
 
         return new_user
 
     async def update_user(self, user: User, user_data: dict, session: AsyncSession):
+        role_changed = "role" in user_data and user_data["role"] != user.role
 
         for k, v in user_data.items():
             setattr(user, k, v)
 
         await session.commit()
+        await principal_cache.invalidate(user.email)
+
+        if role_changed:
+            # issued tokens carry the old role in their claims
+            await revoke_user_tokens(str(user.uid))
 
         return user
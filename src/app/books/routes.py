@@ -1,38 +1,106 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List
-from src.app.books.service import BookService
+from typing import List, Optional
+from src.app.books.service import BookService, book_list_version
+from src.app.books.trending import TrendingService
 from src.app.books.schemas import (
     BookCreateModel,
     BookUpdateModel,
     Book,
     BookDetailsModel,
+    BookPage,
+    BookImportReport,
+    BookSort,
+    TrendingBook,
 )
-from src.app.db.database import get_session
+from src.app.db.database import get_session, get_read_session, reads_from_replica
 from src.app.auth.dependecies import AccessTokenBearer, RoleChecker
+from src.app.utils.config import Config
+from src.app.utils.bulk import iter_csv_rows, iter_ndjson_rows
+from src.app.utils.etag import (
+    make_etag,
+    is_not_modified,
+    not_modified_response,
+    validator_headers,
+)
 
 
 router = APIRouter()
 book_service = BookService()
+trending_service = TrendingService()
 access_token_bearer = AccessTokenBearer()
 role_checker = Depends(RoleChecker(["admin", "user"]))
+read_role_checker = Depends(RoleChecker(["admin", "user"], stateless=True))
+admin_role_checker = Depends(RoleChecker(["admin"]))
+page_size = Query(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE)
 
 
 @router.get(
     "/",
-    response_model=List[Book],
+    response_model=BookPage,
     status_code=status.HTTP_200_OK,
-    dependencies=[role_checker],
+    dependencies=[read_role_checker],
 )
 async def get_all_books(
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    limit: int = page_size,
+    cursor: Optional[str] = None,
+    sort: BookSort = "newest",
+    session: AsyncSession = Depends(get_read_session),
     token_details: dict = Depends(access_token_bearer),
 ):
+    version = await book_list_version.current()
+
+    if version and not reads_from_replica(session):
+        etag = make_etag(version, limit, cursor, sort)
+
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        response.headers.update(validator_headers(etag))
 
-    books = await book_service.get_all_book(session)
+    books = await book_service.get_all_book(
+        session, limit=limit, cursor=cursor, sort=sort
+    )
     return books
 
 
+@router.post(
+    "/import",
+    response_model=BookImportReport,
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def import_books(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    """
+    Bulk load books from an NDJSON (one `BookCreateModel` object per line)
+    or CSV (header row + one book per line) request body. The body is
+    parsed while it streams in and written in batches.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "csv" in content_type:
+        rows = iter_csv_rows(request.stream())
+    elif "json" in content_type:
+        rows = iter_ndjson_rows(request.stream())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send books as application/x-ndjson or text/csv",
+        )
+
+    user_uid = token_details["user"]["user_uid"]
+
+    return await book_service.import_books(rows, user_uid, session)
+
+
 @router.post(
     "/{create_book}",
     response_model=Book,
@@ -52,38 +120,92 @@ async def create_book(
 
 @router.get(
     "/me",
-    response_model=List[Book],
+    response_model=BookPage,
     status_code=status.HTTP_200_OK,
-    dependencies=[role_checker],
+    dependencies=[read_role_checker],
 )
 async def get_book(
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    limit: int = page_size,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
     token_details: dict = Depends(access_token_bearer),
 ):
     user_uid = token_details["user"]["user_uid"]
-    books = await book_service.get_user_book(user_uid, session)
+    version = await book_list_version.current()
+
+    if version and not reads_from_replica(session):
+        etag = make_etag(version, user_uid, limit, cursor)
+
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        response.headers.update(validator_headers(etag))
+
+    books = await book_service.get_user_book(
+        user_uid, session, limit=limit, cursor=cursor
+    )
+
+    return books
+
+
+@router.get(
+    "/trending",
+    response_model=List[TrendingBook],
+    status_code=status.HTTP_200_OK,
+    dependencies=[read_role_checker],
+)
+async def get_trending_books(
+    limit: int = Query(default=10, ge=1, le=Config.MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_read_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    ranking = await trending_service.top(limit, session)
+    books = await book_service.get_books_by_uids(
+        [book_uid for book_uid, _ in ranking], session
+    )
 
-    if books:
-        return books
+    return [
+        {"score": score, "book": books[uid]} for uid, score in ranking if uid in books
+    ]
 
-    return []
 
+@router.get("/export", dependencies=[admin_role_checker])
+async def export_books():
+    return StreamingResponse(
+        book_service.export_books(), media_type="application/x-ndjson"
+    )
 
-@router.get("/{book_uid}", response_model=BookDetailsModel, dependencies=[role_checker])
+
+@router.get(
+    "/{book_uid}", response_model=BookDetailsModel, dependencies=[read_role_checker]
+)
 async def get_book_by_uid(
     book_uid: str,
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
     _: dict = Depends(access_token_bearer),
 ) -> dict:
-    book = await book_service.get_book(book_uid, session)
+    book_details = await book_service.get_book_details(book_uid, session)
 
-    if book:
-        return book
-    else:
+    if not book_details:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
 
+    etag = book_details["etag"]
+    last_modified = datetime.fromisoformat(book_details["last_modified"])
+
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    # already validated against BookDetailsModel when it was cached
+    return JSONResponse(
+        content=book_details["book"],
+        headers=validator_headers(etag, last_modified),
+    )
+
 
 @router.patch(
     "/{book_uid}",
@@ -1,8 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, computed_field
 from datetime import datetime, date
-from typing import List
+from typing import List, Literal, Optional
 from src.app.reviews.schemas import ReviewModel
 
+BookSort = Literal["newest", "rating", "reviews"]
+
 
 class Book(BaseModel):
     uid: str
@@ -12,9 +14,24 @@ class Book(BaseModel):
     published_date: date
     page_count: int
     language: str
+    review_count: int = 0
+    rating_sum: float = Field(default=0, exclude=True)
     created_at: datetime
     updated_at: datetime
 
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        if not self.review_count:
+            return None
+
+        return round(self.rating_sum / self.review_count, 2)
+
+
+class BookPage(BaseModel):
+    items: List[Book]
+    next_cursor: Optional[str] = None
+
 
 class BookCreateModel(BaseModel):
     title: str
@@ -26,13 +43,36 @@ class BookCreateModel(BaseModel):
 
 
 class BookUpdateModel(BaseModel):
-    title: str
-    author: str
-    publisher: str
-    published_date: date
-    page_count: int
-    language: str
+    title: Optional[str] = None
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    published_date: Optional[date] = None
+    page_count: Optional[int] = None
+    language: Optional[str] = None
+
+
+class TrendingBook(BaseModel):
+    score: float
+    book: Book
 
 
 class BookDetailsModel(Book):
+    # the latest BOOK_DETAIL_REVIEWS_LIMIT reviews, newest first
     reviews: List[ReviewModel]
+
+
+class BookImportError(BaseModel):
+    line: Optional[int]
+    error: str
+
+
+class BookImportBatch(BaseModel):
+    batch: int
+    inserted: int
+    errors: List[BookImportError]
+
+
+class BookImportReport(BaseModel):
+    inserted: int
+    rejected: int
+    batches: List[BookImportBatch]
@@ -1,39 +1,292 @@
+import json
 from sqlmodel.ext.asyncio.session import AsyncSession
-from .schemas import BookCreateModel, BookUpdateModel
-from src.app.models.models import Book
+from .schemas import BookCreateModel, BookUpdateModel, BookDetailsModel, BookSort
+from src.app.models.models import Book, Review
 from sqlmodel import select, desc
+from sqlalchemy import bindparam, insert, update, delete, case, func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import load_only, raiseload
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from datetime import datetime
+from src.app.books.trending import TrendingService
+from src.app.db.cache import Cache, VersionTag
+from src.app.db.database import engine, reads_from_replica
+from src.app.db.loader import BatchLoader, get_loader
+from src.app.utils.config import Config
+from src.app.utils.pagination import keyset_after, build_page
+from src.app.utils.bulk import to_ndjson
+from src.app.utils.etag import make_etag
+
+# Columns backing the `Book` response model. List queries load only these
+# and refuse to lazy load anything else, so a page never drags in reviews.
+BOOK_COLUMNS = (
+    Book.uid,
+    Book.title,
+    Book.author,
+    Book.publisher,
+    Book.published_date,
+    Book.page_count,
+    Book.language,
+    Book.review_count,
+    Book.rating_sum,
+    Book.created_at,
+    Book.updated_at,
+)
+LEAN_BOOK_OPTIONS = (load_only(*BOOK_COLUMNS, raiseload=True), raiseload("*"))
+
+
+def average_rating(review_count, rating_sum):
+    """SQL expression for the stored `Book.average_rating`."""
+    return case((review_count > 0, rating_sum / review_count), else_=0)
+
+
+# `rating_sum` and `average_rating` are floats kept up to date incrementally,
+# so they differ from a fresh recomputation by rounding error alone
+RATING_DRIFT_TOLERANCE = 1e-6
+
+
+# sort key and cursor value parser for each `BookSort`
+BOOK_SORTS = {
+    "newest": (Book.created_at, datetime.fromisoformat),
+    "rating": (Book.average_rating, float),
+    "reviews": (Book.review_count, int),
+}
+
+# Hot lookups, built once and executed with bound parameters
+BOOKS_BY_UIDS = (
+    select(Book)
+    .options(*LEAN_BOOK_OPTIONS)
+    .where(Book.uid.in_(bindparam("book_uids", expanding=True)))
+)
+LATEST_BOOK_REVIEWS = (
+    select(Review)
+    .options(raiseload("*"))
+    .where(Review.book_uid == bindparam("book_uid"))
+    .order_by(desc(Review.created_at), desc(Review.uid))
+    .limit(Config.BOOK_DETAIL_REVIEWS_LIMIT)
+)
+
+# serialized `BookDetailsModel` (plus its validators) keyed by book uid;
+# invalidated on every write to the book or its reviews
+book_cache = Cache("book", ttl=Config.BOOK_CACHE_TTL)
+
+# change on every write to the respective table; ETag source for list pages
+book_list_version = VersionTag("books")
+review_list_version = VersionTag("reviews")
+
+trending_service = TrendingService()
+
+
+def book_loader(session: AsyncSession) -> BatchLoader:
+    """Request-scoped loader of lean books by uid."""
+
+    async def load_many(book_uids):
+        result = await session.exec(BOOKS_BY_UIDS, params={"book_uids": book_uids})
+
+        return {book.uid: book for book in result.all()}
+
+    return get_loader(session, "books", load_many)
 
 
 class BookService:
 
-    async def get_all_book(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
+    async def get_all_book(
+        self,
+        session: AsyncSession,
+        limit: int = Config.DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        sort: BookSort = "newest",
+    ):
+        sort_key, parse = BOOK_SORTS[sort]
+
+        # the sort key is selected alongside the book so the cursor carries
+        # exactly the value the database compared, not a recomputed one
+        statement = (
+            select(Book, sort_key.label("sort_key"))
+            .options(*LEAN_BOOK_OPTIONS)
+            .order_by(desc(sort_key), desc(Book.uid))
+            .limit(limit + 1)
+        )
+
+        if cursor:
+            statement = statement.where(
+                keyset_after(sort_key, Book.uid, cursor, parse)
+            )
 
         result = await session.exec(statement)
 
-        return result.all()
+        page = build_page(result.all(), limit, key=lambda row: (row[1], row[0].uid))
+        page["items"] = [row[0] for row in page["items"]]
+
+        return page
 
-    async def get_user_book(self, user_uid: str, session: AsyncSession):
+    async def get_user_book(
+        self,
+        user_uid: str,
+        session: AsyncSession,
+        limit: int = Config.DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
         statement = (
             select(Book)
+            .options(*LEAN_BOOK_OPTIONS)
             .where(Book.user_uid == user_uid)
-            .order_by(desc(Book.created_at))
+            .order_by(desc(Book.created_at), desc(Book.uid))
+            .limit(limit + 1)
         )
 
-        result = await session.exec(statement)
+        if cursor:
+            statement = statement.where(keyset_after(Book.created_at, Book.uid, cursor))
 
-        books = result.all()
+        result = await session.exec(statement)
 
-        return books if books else None
+        return build_page(result.all(), limit)
 
     async def get_book(self, book_uid: str, session: AsyncSession):
-        statement = select(Book).where(Book.uid == book_uid)
+        return await book_loader(session).load(book_uid)
 
-        result = await session.exec(statement)
+    async def get_books_by_uids(self, book_uids: List[str], session: AsyncSession):
+        return await book_loader(session).load_all(book_uids)
+
+    async def get_book_details(self, book_uid: str, session: AsyncSession):
+        book_details = await book_cache.get(book_uid)
+
+        if book_details is not None:
+            return book_details
+
+        # read before the rows: a write that lands in between changes it
+        generation = await book_cache.generation(book_uid)
+        book = await self.get_book(book_uid, session)
+
+        if not book:
+            return None
 
-        book = result.first()
+        # only the latest reviews are embedded; the rest are paginated by
+        # GET /reviews/book/{book_uid}
+        result = await session.exec(LATEST_BOOK_REVIEWS, params={"book_uid": book_uid})
+        reviews = result.all()
+
+        last_modified = max([book.updated_at, *(r.updated_at for r in reviews)])
+
+        book_fields = {
+            name: getattr(book, name)
+            for name in BookDetailsModel.model_fields
+            if name != "reviews"
+        }
+
+        book_body = BookDetailsModel.model_validate(
+            {**book_fields, "reviews": reviews}, from_attributes=True
+        ).model_dump(mode="json")
+
+        book_details = {
+            # a digest of the body itself: `updated_at` has one-second
+            # resolution, so two edits within a second would share a tag
+            "etag": make_etag(book.uid, json.dumps(book_body, sort_keys=True)),
+            "last_modified": last_modified.isoformat(),
+            "book": book_body,
+        }
+
+        # a lagging replica may hand back the row a write just invalidated
+        if not reads_from_replica(session):
+            await book_cache.fill(book_uid, book_details, generation)
+
+        return book_details
+
+    async def adjust_rating_aggregates(
+        self, book_uid: str, count: int, rating: float, session: AsyncSession
+    ):
+        """
+        Add `count` reviews totalling `rating` to the book's aggregates with
+        an atomic in-place UPDATE. Runs in the caller's transaction, so the
+        aggregates commit (or roll back) together with the review itself.
+        """
+        books = Book.__table__
+        review_count = books.c.review_count + count
+        rating_sum = books.c.rating_sum + rating
+
+        result = await session.exec(
+            update(books)
+            .where(books.c.uid == book_uid)
+            # average first: MySQL applies SET assignments left to right,
+            # so later ones would see the already updated count and sum
+            .ordered_values(
+                (books.c.average_rating, average_rating(review_count, rating_sum)),
+                (books.c.review_count, review_count),
+                (books.c.rating_sum, rating_sum),
+            )
+        )
 
-        return book if book else None
+        return result.rowcount
+
+    async def reconcile_rating_aggregates(self, session: AsyncSession):
+        """
+        Recompute `review_count` / `rating_sum` / `average_rating` from
+        `reviews` for every book whose stored aggregates have drifted.
+        Returns the repaired uids.
+        """
+        books, reviews = Book.__table__, Review.__table__
+
+        review_count = (
+            select(func.count(reviews.c.uid))
+            .where(reviews.c.book_uid == books.c.uid)
+            .scalar_subquery()
+        )
+        rating_sum = (
+            select(func.coalesce(func.sum(reviews.c.rating), 0))
+            .where(reviews.c.book_uid == books.c.uid)
+            .scalar_subquery()
+        )
+        average = average_rating(review_count, rating_sum)
+
+        result = await session.exec(
+            select(books.c.uid).where(
+                or_(
+                    books.c.review_count != review_count,
+                    func.abs(books.c.rating_sum - rating_sum)
+                    > RATING_DRIFT_TOLERANCE,
+                    func.abs(books.c.average_rating - average)
+                    > RATING_DRIFT_TOLERANCE,
+                )
+            )
+        )
+        drifted = result.all()
+        batch_size = Config.BOOK_IMPORT_BATCH_SIZE
+
+        for start in range(0, len(drifted), batch_size):
+            batch = drifted[start : start + batch_size]
+
+            await session.exec(
+                update(books)
+                .where(books.c.uid.in_(batch))
+                .values(
+                    review_count=review_count,
+                    rating_sum=rating_sum,
+                    average_rating=average,
+                )
+            )
+            await session.commit()
+            await book_cache.invalidate(*batch)
+
+        if drifted:
+            await book_list_version.bump()
+
+        return drifted
+
+    async def export_books(self, chunk_size: int = Config.EXPORT_CHUNK_SIZE):
+        """
+        Yield every book as NDJSON, `chunk_size` rows per chunk. Rows come
+        from a server-side cursor on a dedicated connection, so memory stays
+        flat however large the table is and the response can outlive the
+        request's session.
+        """
+        statement = Book.__table__.select().execution_options(yield_per=chunk_size)
+
+        async with engine.connect() as conn:
+            result = await conn.stream(statement)
+
+            async for rows in result.mappings().partitions():
+                yield to_ndjson(rows)
 
     async def create_book(
         self, book_data: BookCreateModel, user_uid: str, session: AsyncSession
@@ -45,36 +298,132 @@ class BookService:
 
         session.add(new_book)
         await session.commit()
+        await book_list_version.bump()
 
         return new_book
 
+    async def import_books(
+        self,
+        rows: AsyncIterator[Tuple[int, Any]],
+        user_uid: str,
+        session: AsyncSession,
+        batch_size: int = Config.BOOK_IMPORT_BATCH_SIZE,
+    ):
+        """
+        Validate `(line_number, row)` pairs as they arrive and insert the
+        valid ones as multi-row INSERTs, one transaction per batch. A failing
+        batch is rolled back and reported; later batches still run.
+        """
+        report = {"inserted": 0, "rejected": 0, "batches": []}
+        batch, errors = [], []
+
+        async for line_no, row in rows:
+            try:
+                if isinstance(row, Exception):
+                    raise row
+
+                book_data = BookCreateModel.model_validate(row)
+
+            except (ValidationError, ValueError) as e:
+                errors.append({"line": line_no, "error": str(e)})
+                report["rejected"] += 1
+                continue
+
+            batch.append({**book_data.model_dump(), "user_uid": user_uid})
+
+            if len(batch) >= batch_size:
+                await self._insert_book_batch(batch, errors, report, session)
+                batch, errors = [], []
+
+        if batch or errors:
+            await self._insert_book_batch(batch, errors, report, session)
+
+        return report
+
+    async def _insert_book_batch(
+        self, batch: list, errors: list, report: dict, session: AsyncSession
+    ):
+        inserted = 0
+
+        if batch:
+            try:
+                await session.exec(insert(Book), params=batch)
+                await session.commit()
+                await book_list_version.bump()
+                inserted = len(batch)
+
+            except SQLAlchemyError as e:
+                await session.rollback()
+                errors.append({"line": None, "error": str(e.__cause__ or e)})
+                report["rejected"] += len(batch)
+
+        report["inserted"] += inserted
+        report["batches"].append(
+            {
+                "batch": len(report["batches"]) + 1,
+                "inserted": inserted,
+                "errors": errors,
+            }
+        )
+
     async def update_book(
         self, book_uid: str, book_update_data: BookUpdateModel, session: AsyncSession
     ):
-        book_to_update = await self.get_book(book_uid, session)
-
-        if book_to_update:
+        """
+        PATCH semantics: only the fields sent by the client are written, in a
+        single UPDATE ... WHERE. The updated row comes back via RETURNING when
+        the dialect supports it (PostgreSQL), otherwise with one lean SELECT.
+        """
+        update_book_data_dict = book_update_data.model_dump(
+            exclude_unset=True, exclude_none=True
+        )
 
-            update_book_data_dict = book_update_data.model_dump()
+        if not update_book_data_dict:
+            return await self.get_book(book_uid, session)
 
-            for k, v in update_book_data_dict.items():
-                setattr(book_to_update, k, v)
+        books = Book.__table__
+        statement = (
+            update(books).where(books.c.uid == book_uid).values(**update_book_data_dict)
+        )
 
+        if session.get_bind().dialect.update_returning:
+            result = await session.exec(statement.returning(*books.c))
+            updated_book = result.mappings().first()
             await session.commit()
+        else:
+            result = await session.exec(statement)
+            await session.commit()
+            book_loader(session).clear(book_uid)
+            updated_book = (
+                await self.get_book(book_uid, session) if result.rowcount else None
+            )
 
-            return book_to_update
+        if not updated_book:
+            return None
 
-        return None
+        await book_cache.invalidate(book_uid)
+        await book_list_version.bump()
 
-    async def delete_book(self, book_uid: str, session: AsyncSession):
-        book_to_delete = await self.get_book(book_uid, session)
+        return updated_book
 
-        if book_to_delete:
+    async def delete_book(self, book_uid: str, session: AsyncSession):
+        books, reviews = Book.__table__, Review.__table__
 
-            await session.delete(book_to_delete)
+        # detach the book's reviews first (what the ORM cascade used to do),
+        # without loading them
+        await session.exec(
+            update(reviews).where(reviews.c.book_uid == book_uid).values(book_uid=None)
+        )
+        result = await session.exec(delete(books).where(books.c.uid == book_uid))
+        await session.commit()
+        book_loader(session).clear(book_uid)
 
-            await session.commit()
+        if not result.rowcount:
+            return None
 
-            return {"status": "ok"}
+        await book_cache.invalidate(book_uid)
+        await book_list_version.bump()
+        await review_list_version.bump()
+        await trending_service.remove_book(book_uid)
 
-        return None
+        return {"status": "ok"}
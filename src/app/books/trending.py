@@ -0,0 +1,138 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from redis.exceptions import RedisError
+from sqlalchemy import func
+from sqlmodel import select, desc
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.app.db.redis import redis_client
+from src.app.models.models import Review
+from src.app.utils.config import Config
+
+BUCKET_SECONDS = 3600
+
+
+def review_score(count, rating_sum):
+    # one point per review plus up to one more for its rating
+    return count + rating_sum / 5
+
+
+class TrendingService:
+    """
+    Ranks books by review activity over the last TRENDING_WINDOW_HOURS.
+
+    Each review adds its score to the sorted set of the hour it was written
+    in (`trending:<hour>`); deleting the review subtracts it again and
+    deleting the book drops it from every set. Reads merge the window's
+    hourly sets with ZUNIONSTORE into `trending:window:<hour>`, which is
+    reused for TRENDING_REFRESH_SECONDS, so a top-N read is one
+    O(log n + N) ZREVRANGE. Without Redis the ranking is computed from
+    `reviews`.
+    """
+
+    def __init__(self, client=redis_client):
+        self.client = client
+        self.window_buckets = Config.TRENDING_WINDOW_HOURS
+
+    def _bucket_key(self, bucket: int) -> str:
+        return f"trending:{bucket}"
+
+    async def record_review(
+        self, book_uid: str, rating: float, at: Optional[float] = None
+    ) -> None:
+        bucket = int((at or time.time()) // BUCKET_SECONDS)
+        key = self._bucket_key(bucket)
+
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.zincrby(key, review_score(1, rating), book_uid)
+                pipe.expire(key, (self.window_buckets + 1) * BUCKET_SECONDS)
+                await pipe.execute()
+
+        except RedisError as e:
+            logging.warning("could not record review for trending: %s", e)
+
+    async def remove_review(self, book_uid: str, rating: float, at: float) -> None:
+        """Undo `record_review` for a review written at `at`."""
+        bucket = int(at // BUCKET_SECONDS)
+
+        # older buckets have already left the window (and expired)
+        if bucket not in self._live_buckets():
+            return
+
+        key = self._bucket_key(bucket)
+
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.zincrby(key, -review_score(1, rating), book_uid)
+                # every review scores at least 1, so anything below half of
+                # that is a book with no reviews left in the hour, plus
+                # rounding residue
+                pipe.zremrangebyscore(key, "-inf", review_score(1, 0) / 2)
+                await pipe.execute()
+
+        except RedisError as e:
+            logging.warning("could not remove review from trending: %s", e)
+
+    async def remove_book(self, book_uid: str) -> None:
+        live = self._live_buckets()
+        # the merged window too, or the book stays listed until it's rebuilt
+        keys = [self._bucket_key(b) for b in live] + [self._window_key(live[-1])]
+
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.zrem(key, book_uid)
+
+                await pipe.execute()
+
+        except RedisError as e:
+            logging.warning("could not remove book from trending: %s", e)
+
+    def _live_buckets(self) -> range:
+        current = int(time.time() // BUCKET_SECONDS)
+
+        return range(current - self.window_buckets + 1, current + 1)
+
+    def _window_key(self, bucket: int) -> str:
+        return f"trending:window:{bucket}"
+
+    async def top(self, limit: int, session: AsyncSession) -> List[Tuple[str, float]]:
+        try:
+            return await self._top_from_redis(limit)
+
+        except RedisError as e:
+            logging.warning("trending falling back to SQL: %s", e)
+
+            return await self._top_from_sql(limit, session)
+
+    async def _top_from_redis(self, limit: int) -> List[Tuple[str, float]]:
+        buckets = self._live_buckets()
+        window_key = self._window_key(buckets[-1])
+
+        if not await self.client.exists(window_key):
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.zunionstore(window_key, [self._bucket_key(b) for b in buckets])
+                pipe.expire(window_key, Config.TRENDING_REFRESH_SECONDS)
+                await pipe.execute()
+
+        return await self.client.zrevrange(window_key, 0, limit - 1, withscores=True)
+
+    async def _top_from_sql(
+        self, limit: int, session: AsyncSession
+    ) -> List[Tuple[str, float]]:
+        since = datetime.now() - timedelta(hours=self.window_buckets)
+        score = review_score(func.count(Review.uid), func.sum(Review.rating))
+
+        statement = (
+            select(Review.book_uid, score.label("score"))
+            .where(Review.created_at >= since, Review.book_uid.is_not(None))
+            .group_by(Review.book_uid)
+            .order_by(desc("score"))
+            .limit(limit)
+        )
+
+        result = await session.exec(statement)
+
+        return [(book_uid, float(score)) for book_uid, score in result.all()]
@@ -0,0 +1,295 @@
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from redis.exceptions import RedisError
+from src.app.db.redis import redis_client
+from src.app.utils.config import Config
+from src.app.utils.metrics import incr
+
+# KEYS[1] = entry, KEYS[2] = its generation; ARGV = value, ttl, generation.
+# Stores the entry only while the generation is still the one expected.
+GUARDED_SET_LUA = """
+if (redis.call("GET", KEYS[2]) or "") ~= ARGV[3] then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[2])
+return 1
+"""
+
+
+class MemoryCacheBackend:
+    """
+    Bounded in-process LRU, used when CACHE_BACKEND=memory (tests, local
+    development without Redis). Evicts least recently used entries once
+    the stored values exceed `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+
+        if expires_at < time.monotonic():
+            self._pop(key)
+            return None
+
+        self._entries.move_to_end(key)
+
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._pop(key)
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.size += len(value)
+
+        while self.size > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._pop(oldest)
+            incr("cache.evictions")
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._pop(key)
+
+    async def set_if(
+        self, key: str, value: str, ttl: int, guard_key: str, guard_value: str
+    ) -> bool:
+        if (await self.get(guard_key) or "") != guard_value:
+            return False
+
+        await self.set(key, value, ttl)
+
+        return True
+
+    async def invalidate(
+        self, keys: List[str], generations: Dict[str, str], ttl: int
+    ) -> None:
+        await self.delete(*keys)
+
+        for key, generation in generations.items():
+            await self.set(key, generation, ttl)
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+class RedisCacheBackend:
+    """
+    Shared cache on the app's Redis connection. Every key is written with
+    a TTL; size is bounded by the server's `maxmemory` with a `volatile-*`
+    eviction policy.
+    """
+
+    def __init__(self, client=redis_client):
+        self.client = client
+        self.guarded_set = client.register_script(GUARDED_SET_LUA)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        await self.client.delete(*keys)
+
+    async def set_if(
+        self, key: str, value: str, ttl: int, guard_key: str, guard_value: str
+    ) -> bool:
+        stored = await self.guarded_set(
+            keys=[key, guard_key], args=[value, ttl, guard_value]
+        )
+
+        return bool(stored)
+
+    async def invalidate(
+        self, keys: List[str], generations: Dict[str, str], ttl: int
+    ) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(*keys)
+
+            for key, generation in generations.items():
+                pipe.set(key, generation, ex=ttl)
+
+            await pipe.execute()
+
+
+_memory_backend = None
+
+
+def get_cache_backend():
+    global _memory_backend
+
+    if Config.CACHE_BACKEND == "memory":
+        # one LRU per process, so CACHE_MAX_BYTES is a process-wide budget
+        if _memory_backend is None:
+            _memory_backend = MemoryCacheBackend(max_bytes=Config.CACHE_MAX_BYTES)
+
+        return _memory_backend
+
+    return RedisCacheBackend()
+
+
+class Cache:
+    """
+    JSON read-through cache for one kind of object. A failing backend is
+    treated as a miss so the request falls through to the database.
+
+    Read-through loads store their result with `fill()` rather than `set()`:
+    every invalidation changes the key's generation, so a value loaded
+    before a concurrent write is dropped instead of being cached after it.
+
+    With `local_ttl`, values are also kept in a small in-process tier that
+    is consulted first. Invalidation clears it only in the current process;
+    other workers may serve the old value for up to `local_ttl` seconds.
+    """
+
+    def __init__(self, namespace: str, ttl: int, backend=None, local_ttl: int = 0):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = backend or get_cache_backend()
+        self.local_ttl = local_ttl
+        self.local = (
+            MemoryCacheBackend(max_bytes=Config.LOCAL_CACHE_MAX_BYTES)
+            if local_ttl
+            else None
+        )
+
+    def _key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _generation_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:generation:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        if self.local:
+            raw = await self.local.get(key)
+
+            if raw is not None:
+                incr(f"cache.{self.namespace}.local_hits")
+                return json.loads(raw)
+
+        try:
+            raw = await self.backend.get(self._key(key))
+        except RedisError as e:
+            logging.warning("cache get failed for %s: %s", self._key(key), e)
+            raw = None
+
+        if raw is None:
+            incr(f"cache.{self.namespace}.misses")
+            return None
+
+        incr(f"cache.{self.namespace}.hits")
+
+        if self.local:
+            await self.local.set(key, raw, self.local_ttl)
+
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        raw = json.dumps(value)
+
+        if self.local:
+            await self.local.set(key, raw, self.local_ttl)
+
+        try:
+            await self.backend.set(self._key(key), raw, self.ttl)
+        except RedisError as e:
+            logging.warning("cache set failed for %s: %s", self._key(key), e)
+
+    async def generation(self, key: str) -> Optional[str]:
+        """
+        Token to pass to `fill()`, read before loading the value. None when
+        the backend can't be reached (the value is then not cached).
+        """
+        try:
+            return await self.backend.get(self._generation_key(key)) or ""
+        except RedisError as e:
+            logging.warning("cache generation failed for %s: %s", self._key(key), e)
+            return None
+
+    async def fill(self, key: str, value: Any, generation: Optional[str]) -> None:
+        """`set()`, unless `key` was invalidated since `generation` was read."""
+        if generation is None:
+            return
+
+        raw = json.dumps(value)
+
+        try:
+            stored = await self.backend.set_if(
+                self._key(key), raw, self.ttl, self._generation_key(key), generation
+            )
+        except RedisError as e:
+            logging.warning("cache fill failed for %s: %s", self._key(key), e)
+            return
+
+        if not stored:
+            incr(f"cache.{self.namespace}.stale_fills")
+            return
+
+        if self.local:
+            await self.local.set(key, raw, self.local_ttl)
+
+    async def invalidate(self, *keys: str) -> None:
+        if self.local:
+            await self.local.delete(*keys)
+
+        try:
+            await self.backend.invalidate(
+                [self._key(key) for key in keys],
+                {self._generation_key(key): uuid.uuid4().hex for key in keys},
+                self.ttl,
+            )
+            incr(f"cache.{self.namespace}.invalidations", len(keys))
+        except RedisError as e:
+            logging.warning("cache invalidation failed for %s: %s", keys, e)
+
+
+class VersionTag:
+    """
+    Opaque token that changes whenever a collection changes. List endpoints
+    build their ETags from it, so a conditional GET can be answered without
+    querying the collection. Writers call `bump()` after committing.
+    """
+
+    def __init__(self, name: str, ttl: int = 24 * 3600, backend=None):
+        self.key = f"version:{name}"
+        self.ttl = ttl
+        self.backend = backend or get_cache_backend()
+
+    async def current(self) -> Optional[str]:
+        try:
+            version = await self.backend.get(self.key)
+
+            if version is None:
+                # never a counter: a flushed/expired key must not bring an
+                # old version (and the ETags built from it) back to life
+                version = uuid.uuid4().hex
+                await self.backend.set(self.key, version, self.ttl)
+
+            return version
+
+        except RedisError as e:
+            logging.warning("version lookup failed for %s: %s", self.key, e)
+            return None
+
+    async def bump(self) -> None:
+        try:
+            await self.backend.set(self.key, uuid.uuid4().hex, self.ttl)
+        except RedisError as e:
+            logging.warning("version bump failed for %s: %s", self.key, e)
@@ -1,10 +1,165 @@
+import logging
+import time
+from typing import Optional
+from fastapi import Request
+from redis.exceptions import RedisError
 from sqlmodel import SQLModel
+from sqlalchemy.engine import make_url
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.app.db.instrumentation import instrument_engine
+from src.app.db.redis import redis_client
 from src.app.utils.config import Config
+from src.app.utils.metrics import incr, observe, register_gauge
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-engine = create_async_engine(url=Config.DATABASE_URL, echo=True)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        finally:
+            observe("db.pool.checkout", time.perf_counter() - start)
+
+
+def pool_options(url: str) -> dict:
+    # SQLite (local runs) keeps SQLAlchemy's default pool for its driver
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+
+    return {
+        "poolclass": InstrumentedPool,
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        "pool_pre_ping": Config.DB_POOL_PRE_PING,
+    }
+
+
+def make_engine(url: str):
+    options = pool_options(url)
+
+    if make_url(url).get_driver_name() == "asyncpg":
+        # statements are prepared server-side and kept per connection
+        options["connect_args"] = {
+            "prepared_statement_cache_size": Config.DB_PREPARED_STATEMENT_CACHE_SIZE
+        }
+
+    return create_async_engine(
+        url=url,
+        echo=Config.DB_ECHO,
+        query_cache_size=Config.DB_QUERY_CACHE_SIZE,
+        **options,
+    )
+
+
+class ReplicaHealth:
+    """
+    Circuit breaker for the replica: after a connection failure, reads go
+    to the primary for REPLICA_RETRY_SECONDS before the replica is tried
+    again.
+    """
+
+    def __init__(self):
+        self.down_until = 0.0
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, error: Exception) -> None:
+        logging.warning("read replica unavailable, using primary: %s", error)
+        incr("db.replica.failures")
+        self.down_until = time.monotonic() + Config.REPLICA_RETRY_SECONDS
+
+
+replica_health = ReplicaHealth()
+
+
+# connection failures worth retrying the read elsewhere
+CONNECTION_ERRORS = (
+    exc.OperationalError,
+    exc.InterfaceError,
+    exc.TimeoutError,
+    OSError,
+)
+
+
+class ReadOnlySession(AsyncSession):
+    """
+    Session for read-only routes. A connection is only checked out when a
+    statement runs, and a statement that opened the transaction commits as
+    soon as its (buffered) result is back, so the connection returns to
+    the pool before the response is serialized rather than at the end of
+    the request. Loaded objects stay usable: `expire_on_commit=False`.
+
+    With a `fallback_bind` in `info`, a statement whose connection fails is
+    retried once on that engine and the replica is marked down.
+    `info["replica"]` is set while the session reads from the replica.
+    """
+
+    async def exec(self, statement, **kwargs):
+        opened = not self.in_transaction()
+
+        try:
+            result = await super().exec(statement, **kwargs)
+
+        except CONNECTION_ERRORS as e:
+            fallback = self.info.pop("fallback_bind", None)
+
+            if fallback is None or not opened:
+                raise
+
+            replica_health.mark_down(e)
+            self.info.pop("replica", None)
+            # ends the failed transaction without expiring loaded objects,
+            # which stay readable as detached instances
+            await self.close()
+            self.bind = fallback
+            self.sync_session.bind = fallback.sync_engine
+
+            result = await super().exec(statement, **kwargs)
+
+        if opened and not (self.new or self.dirty or self.deleted):
+            await self.commit()
+
+        return result
+
+
+engine = make_engine(Config.DATABASE_URL)
+instrument_engine(engine)
+
+Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+PrimaryReadSession = sessionmaker(
+    bind=engine, class_=ReadOnlySession, expire_on_commit=False
+)
+
+# optional read replica, used by `get_read_session`
+replica_engine = (
+    make_engine(Config.DATABASE_REPLICA_URL) if Config.DATABASE_REPLICA_URL else None
+)
+
+if replica_engine:
+    instrument_engine(replica_engine)
+
+ReplicaSession = (
+    sessionmaker(bind=replica_engine, class_=ReadOnlySession, expire_on_commit=False)
+    if replica_engine
+    else None
+)
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+if isinstance(engine.pool, AsyncAdaptedQueuePool):
+    register_gauge("db.pool.checked_out", engine.pool.checkedout)
+    register_gauge("db.pool.overflow", engine.pool.overflow)
+    register_gauge("db.pool.size", engine.pool.size)
 
 
 async def init_db():
@@ -19,7 +174,82 @@ async def init_db():
 
 async def get_session() -> AsyncSession:
 
-    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
-
     async with Session() as session:
         yield session
+
+
+def _sticky_key(request: Request) -> Optional[str]:
+    # set by `TokenBearer`, which runs before the route's session dependency
+    verified = getattr(request.state, "verified_token", None)
+
+    if verified is None:
+        return None
+
+    return f"replica:sticky:{verified[1]['user'].get('user_uid')}"
+
+
+async def mark_recent_write(request: Request) -> None:
+    """
+    Called after a successful write request: pins the user's reads to the
+    primary for REPLICA_STICKY_SECONDS, so they see their own changes
+    even while the replica lags.
+    """
+    if replica_engine is None or request.method in READ_METHODS:
+        return
+
+    key = _sticky_key(request)
+
+    if key is None:
+        return
+
+    try:
+        await redis_client.set(key, "1", ex=Config.REPLICA_STICKY_SECONDS)
+    except RedisError as e:
+        logging.warning("could not pin reads to primary: %s", e)
+
+
+async def _wrote_recently(request: Request) -> bool:
+    key = _sticky_key(request)
+
+    if key is None:
+        return False
+
+    try:
+        return await redis_client.exists(key) > 0
+    except RedisError:
+        # can't tell, so stay on the primary
+        return True
+
+
+def reads_from_replica(session: AsyncSession) -> bool:
+    """
+    True when the session's queries go to the replica, whose rows may lag
+    behind the primary. Such rows must not be cached or paired with
+    validators (e.g. list version tags) that the primary already moved on.
+    """
+    return session.info.get("replica", False)
+
+
+async def get_read_session(request: Request) -> AsyncSession:
+    """
+    Session for read-only routes. Uses the replica when one is configured,
+    healthy, and the user has not written recently; otherwise the primary.
+    """
+    use_replica = (
+        replica_engine is not None
+        and replica_health.available()
+        and not await _wrote_recently(request)
+    )
+
+    if use_replica:
+        incr("db.replica.sessions")
+
+        async with ReplicaSession(
+            info={"fallback_bind": engine, "replica": True}
+        ) as session:
+            yield session
+
+        return
+
+    async with PrimaryReadSession() as session:
+        yield session
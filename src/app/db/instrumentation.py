@@ -0,0 +1,151 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from sqlalchemy import event
+from src.app.utils.config import Config
+from src.app.utils.metrics import incr, observe
+
+
+class RequestDBStats:
+    """Database usage of one request, filled in by engine event hooks."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.hold_seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.query_seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> List[tuple]:
+        """Statements run at least `threshold` times: likely an N+1."""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+request_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def track_request() -> RequestDBStats:
+    """
+    Start collecting stats for the current request. Call it before the
+    request is handed to the app: tasks spawned from here on share the
+    returned object.
+    """
+    stats = RequestDBStats()
+    request_db_stats.set(stats)
+
+    return stats
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+    incr("db.connection.checkouts")
+
+    stats = request_db_stats.get()
+
+    if stats is not None:
+        stats.checkouts += 1
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    checked_out_at = connection_record.info.pop("checked_out_at", None)
+
+    if checked_out_at is None:
+        return
+
+    held = time.perf_counter() - checked_out_at
+    observe("db.connection.hold", held)
+
+    stats = request_db_stats.get()
+
+    if stats is not None:
+        stats.hold_seconds += held
+
+
+# stats of the `query_budget` blocks currently running, in any thread
+_budgets: List[RequestDBStats] = []
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_started_at = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - context.query_started_at
+
+    incr("db.queries")
+    observe("db.query", seconds)
+
+    stats = request_db_stats.get()
+
+    if stats is not None:
+        stats.record_query(statement, seconds)
+
+    for budget in _budgets:
+        budget.record_query(statement, seconds)
+
+
+def report_repeated_statements(stats: RequestDBStats, where: str) -> None:
+    for statement, count in stats.repeated_statements(Config.N_PLUS_ONE_THRESHOLD):
+        incr("db.n_plus_one")
+        logging.warning(
+            "possible N+1 in %s: statement ran %d times: %s",
+            where,
+            count,
+            " ".join(statement.split()),
+        )
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[RequestDBStats]:
+    """
+    Fail with AssertionError when the block issues more than `max_queries`
+    statements, e.g. in a test:
+
+        with query_budget(3):
+            client.get("/api/v1/auth/me", headers=headers)
+
+    Every statement the process runs during the block is counted, whatever
+    thread or task runs it, so requests made through TestClient count too.
+    """
+    stats = RequestDBStats()
+    _budgets.append(stats)
+
+    try:
+        yield stats
+    finally:
+        _budgets.remove(stats)
+
+    if stats.queries > max_queries:
+        statements = "\n".join(
+            f"  {count}x {' '.join(statement.split())}"
+            for statement, count in stats.statements.most_common()
+        )
+
+        raise AssertionError(
+            f"{stats.queries} queries issued, budget was {max_queries}:\n{statements}"
+        )
+
+
+def instrument_engine(engine) -> None:
+    """
+    Record how long each connection of `engine` stays checked out, and the
+    count and duration of the statements it runs.
+    """
+    event.listen(engine.sync_engine, "checkout", _on_checkout)
+    event.listen(engine.sync_engine, "checkin", _on_checkin)
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_execute)
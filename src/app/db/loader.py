@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.app.utils.metrics import incr
+
+LoadMany = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class BatchLoader:
+    """
+    DataLoader-style batching for one session (i.e. one request).
+
+    `load(key)` calls made in the same event-loop tick are coalesced into a
+    single `load_many(keys)` call, typically one `WHERE key IN (...)` query.
+    Results, including misses (None), are remembered until `clear()`, so
+    the same row is fetched at most once per request. Writers must clear
+    the keys they change.
+    """
+
+    def __init__(self, name: str, load_many: LoadMany):
+        self.name = name
+        self.load_many = load_many
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._pending: List[tuple] = []
+        self._batches: set = set()
+
+    async def load(self, key: Hashable) -> Any:
+        future = self._futures.get(key)
+
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+
+            self._pending.append((key, future))
+        else:
+            incr(f"loader.{self.name}.hits")
+
+        # shielded: a cancelled caller must not cancel the shared lookup
+        return await asyncio.shield(future)
+
+    async def load_all(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Load several keys at once; misses are left out of the result."""
+        keys = list(dict.fromkeys(keys))
+        values = await asyncio.gather(*(self.load(key) for key in keys))
+
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def clear(self, *keys: Hashable) -> None:
+        """Forget `keys` (everything when none are given)."""
+        for key in keys or list(self._futures):
+            self._futures.pop(key, None)
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, []
+
+        task = asyncio.ensure_future(self._fetch(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _fetch(self, batch: List[tuple]) -> None:
+        incr(f"loader.{self.name}.batches")
+
+        try:
+            found = await self.load_many([key for key, _ in batch])
+
+        except Exception as e:
+            for key, future in batch:
+                # failures are not remembered, the next load tries again
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+
+                if not future.done():
+                    future.set_exception(e)
+
+            return
+
+        for key, future in batch:
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+def get_loader(session: AsyncSession, name: str, load_many: LoadMany) -> BatchLoader:
+    """The session's loader called `name`, created on first use."""
+    loaders = session.info.setdefault("loaders", {})
+
+    if name not in loaders:
+        loaders[name] = BatchLoader(name, load_many)
+
+    return loaders[name]
@@ -1,20 +1,226 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from src.app.utils.config import Config
+from src.app.utils.metrics import incr
 
 JTI_EXPIRY = 3600
+# outlives the longest-lived (refresh) token issued before a revocation
+USER_REVOCATION_EXPIRY = 2 * 24 * 3600
+BLOCKLIST_PREFIX = "blocklist:"
+USER_PREFIX = "user:"
+BLOCKLIST_CHANNEL = "blocklist:revoked"
+# JTIs (uuid4 strings) revoked before the `blocklist:` prefix existed were
+# stored under bare keys, which stay live for up to JTI_EXPIRY after the
+# first start of a version writing prefixed keys (recorded, once, under
+# PREFIXED_SINCE_KEY). Drop both, and the scan in `BlocklistMirror`, once
+# every deployment has run that version for longer than JTI_EXPIRY.
+LEGACY_JTI_PATTERN = "-".join("?" * n for n in (8, 4, 4, 4, 12))
+PREFIXED_SINCE_KEY = "blocklist_prefixed_since"
 
 # to run the Redis on docker
 # docker run -d --name my-redis -p 6379:6379 redis:7-alpine
-token_blocklist: Redis = Redis.from_url(
+redis_client: Redis = Redis.from_url(
     Config.REDIS_URL,
     encoding="utf-8",
     decode_responses=True,
 )
 
 
+class BlocklistMirror:
+    """
+    Process-local copy of the JTI blocklist, kept in sync over Redis pub/sub.
+
+    The listener PINGs every BLOCKLIST_HEARTBEAT seconds. Redis delivers a
+    PONG after every message published before it, so when a PONG arrives
+    the mirror holds every revocation made before the matching PING was
+    sent. The mirror only answers while that point is less than
+    BLOCKLIST_MAX_STALENESS seconds old. Otherwise (startup, lost
+    connection, resubscribe in progress) callers fall back to Redis.
+
+    Besides single JTIs it tracks per-user revocations: every token of a
+    user issued before `users[user_uid]` is revoked. JTIs still stored
+    under the legacy bare keys are loaded too, until the last of them
+    has expired.
+    """
+
+    def __init__(self, client: Redis = redis_client):
+        self.client = client
+        self.revoked: Dict[str, float] = {}
+        self.users: Dict[str, float] = {}
+        self.synced_at: Optional[float] = None
+        self.legacy_keys_until: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_fresh(self) -> bool:
+        return (
+            self.synced_at is not None
+            and time.monotonic() - self.synced_at <= Config.BLOCKLIST_MAX_STALENESS
+        )
+
+    def add(self, jti: str, ttl: int = JTI_EXPIRY) -> None:
+        self.revoked[jti] = time.time() + ttl
+
+    def contains(self, jti: str) -> bool:
+        expires_at = self.revoked.get(jti)
+
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke_user(self, user_uid: str, revoked_at: float) -> None:
+        self.users[user_uid] = max(revoked_at, self.users.get(user_uid, 0))
+
+    def user_revoked_at(self, user_uid: str) -> float:
+        return self.users.get(user_uid, 0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        self.synced_at = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except RedisError as e:
+                logging.warning("blocklist listener disconnected: %s", e)
+
+            self.synced_at = None
+            await asyncio.sleep(Config.BLOCKLIST_HEARTBEAT)
+
+    async def _listen(self) -> None:
+        async with self.client.pubsub() as pubsub:
+            # subscribe before loading, so nothing revoked in between is lost
+            await pubsub.subscribe(BLOCKLIST_CHANNEL)
+            await self._load()
+
+            pings = []
+
+            while True:
+                pings.append(time.monotonic())
+                await pubsub.ping()
+
+                deadline = time.monotonic() + Config.BLOCKLIST_HEARTBEAT
+
+                while (timeout := deadline - time.monotonic()) > 0:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=timeout
+                    )
+
+                    if message is None:
+                        continue
+
+                    if message["type"] == "pong":
+                        self.synced_at = pings.pop(0)
+                    elif message["type"] == "message":
+                        self._apply(message["data"])
+
+                self._prune()
+
+    def _apply(self, data: str) -> None:
+        if data.startswith(USER_PREFIX):
+            user_uid, revoked_at = data.removeprefix(USER_PREFIX).rsplit(":", 1)
+            self.revoke_user(user_uid, float(revoked_at))
+        else:
+            self.add(data)
+
+    async def _load(self) -> None:
+        async for key in self.client.scan_iter(match=f"{BLOCKLIST_PREFIX}*"):
+            name = key.removeprefix(BLOCKLIST_PREFIX)
+
+            if name.startswith(USER_PREFIX):
+                revoked_at = await self.client.get(key)
+
+                if revoked_at is not None:
+                    self.revoke_user(name.removeprefix(USER_PREFIX), float(revoked_at))
+            else:
+                self.add(name)
+
+        if await self._legacy_keys_live():
+            async for key in self.client.scan_iter(match=LEGACY_JTI_PATTERN):
+                self.add(key)
+
+    async def _legacy_keys_live(self) -> bool:
+        if self.legacy_keys_until is None:
+            await self.client.set(PREFIXED_SINCE_KEY, repr(time.time()), nx=True)
+            prefixed_since = await self.client.get(PREFIXED_SINCE_KEY)
+            self.legacy_keys_until = float(prefixed_since) + JTI_EXPIRY
+
+        return time.time() < self.legacy_keys_until
+
+    def _prune(self) -> None:
+        now = time.time()
+
+        expired = [jti for jti, expires_at in self.revoked.items() if expires_at <= now]
+
+        for jti in expired:
+            del self.revoked[jti]
+
+        cutoff = now - USER_REVOCATION_EXPIRY
+        expired = [uid for uid, revoked_at in self.users.items() if revoked_at < cutoff]
+
+        for user_uid in expired:
+            del self.users[user_uid]
+
+
+blocklist_mirror = BlocklistMirror()
+
+
 async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(name=f"{BLOCKLIST_PREFIX}{jti}", value="", ex=JTI_EXPIRY)
+        pipe.publish(BLOCKLIST_CHANNEL, jti)
+        await pipe.execute()
+
+    blocklist_mirror.add(jti)
+
+
+async def revoke_user_tokens(user_uid: str) -> None:
+    """Revoke every token issued to the user so far, e.g. on a role change."""
+    revoked_at = time.time()
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.set(
+            name=f"{BLOCKLIST_PREFIX}{USER_PREFIX}{user_uid}",
+            value=repr(revoked_at),
+            ex=USER_REVOCATION_EXPIRY,
+        )
+        pipe.publish(BLOCKLIST_CHANNEL, f"{USER_PREFIX}{user_uid}:{revoked_at!r}")
+        await pipe.execute()
+
+    blocklist_mirror.revoke_user(user_uid, revoked_at)
+
+
+async def is_token_revoked(token_data: dict) -> bool:
+    """
+    True when the token's JTI is blocklisted or it was issued before its
+    user's tokens were revoked. Tokens without `iat` predate per-user
+    revocation and count as issued at the epoch.
+    """
+    jti = token_data["jti"]
+    user_uid = token_data["user"].get("user_uid")
+    issued_at = token_data.get("iat", 0)
+
+    if blocklist_mirror.is_fresh():
+        incr("blocklist.local_checks")
+        revoked_at = blocklist_mirror.user_revoked_at(user_uid)
+
+        return blocklist_mirror.contains(jti) or issued_at < revoked_at
+
+    incr("blocklist.redis_checks")
 
+    async with redis_client.pipeline(transaction=False) as pipe:
+        # bare `jti` keys were written before the `blocklist:` prefix existed
+        pipe.exists(f"{BLOCKLIST_PREFIX}{jti}", jti)
+        pipe.get(f"{BLOCKLIST_PREFIX}{USER_PREFIX}{user_uid}")
+        in_blocklist, revoked_at = await pipe.execute()
 
-async def is_token_in_blocklist(jti: str) -> bool:
-    return await token_blocklist.get(jti) is not None
+    return in_blocklist > 0 or issued_at < float(revoked_at or 0)
@@ -1,18 +1,29 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from src.app.db.database import init_db
+from src.app.db.redis import blocklist_mirror
+from src.app.utils.security import password_hasher
 from src.app.books.routes import router as book_router
 from src.app.auth.routes import router as auth_router
 from src.app.reviews.routes import router as review_router
 from src.app.utils.middleware import register_middleware
 from src.app.utils.errors import register_all_errors
+from src.app.utils import metrics
+from src.app.utils.config import Config
 
 
 @asynccontextmanager
 async def life_span(app: FastAPI):
     print("Server is starting ...")
-    await init_db()
+
+    if Config.ENVIRONMENT != "production":
+        await init_db()
+
+    blocklist_mirror.start()
+    password_hasher.start()
     yield
+    await blocklist_mirror.stop()
+    password_hasher.shutdown()
     print("Server has been stopped")
 
 
@@ -33,3 +44,8 @@ register_middleware(app)
 app.include_router(book_router, prefix=f"/api/{version}/books", tags=["books"])
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
 app.include_router(review_router, prefix=f"/api/{version}/reviews", tags=["reviews"])
+
+
+@app.get(f"/api/{version}/metrics", include_in_schema=False)
+async def get_metrics():
+    return metrics.snapshot()
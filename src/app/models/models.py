@@ -1,7 +1,7 @@
 from sqlmodel import SQLModel, Field, Column, Relationship
 import sqlalchemy.dialects.mysql as ms
 from datetime import datetime
-from sqlalchemy import String
+from sqlalchemy import String, Index, Integer, Float, Double
 import uuid
 from typing import List, Optional
 from datetime import date
@@ -20,7 +20,7 @@ class User(SQLModel, table=True):
     )
 
     username: str
-    email: str
+    email: str = Field(unique=True, index=True)
     first_name: str
     last_name: str
     is_verified: bool = Field(default=False)
@@ -29,7 +29,9 @@ class User(SQLModel, table=True):
         sa_column=Column(ms.VARCHAR(255), nullable=False, server_default="user")
     )
     created_at: datetime = Field(sa_column=Column(ms.TIMESTAMP, default=datetime.now))
-    updated_at: datetime = Field(sa_column=Column(ms.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(ms.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
     books: List["Book"] = Relationship(
         back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
     )
@@ -43,6 +45,13 @@ class User(SQLModel, table=True):
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        # keyset pagination: ORDER BY created_at DESC, uid DESC
+        Index("ix_books_created_at_uid", "created_at", "uid"),
+        Index("ix_books_user_uid_created_at_uid", "user_uid", "created_at", "uid"),
+        Index("ix_books_review_count_uid", "review_count", "uid"),
+        Index("ix_books_average_rating_uid", "average_rating", "uid"),
+    )
 
     uid: str = Field(
         sa_column=Column(
@@ -60,8 +69,25 @@ class Book(SQLModel, table=True):
     page_count: int
     language: str
     user_uid: Optional[str] = Field(default=None, foreign_key="users.uid")
+    # denormalized from `reviews`, maintained by ReviewService
+    review_count: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, default=0, server_default="0"),
+    )
+    rating_sum: float = Field(
+        default=0,
+        sa_column=Column(Float, nullable=False, default=0, server_default="0"),
+    )
+    # rating_sum / review_count (0 without reviews), stored so the rating
+    # sort can walk an index; DOUBLE so keyset cursors compare exactly
+    average_rating: float = Field(
+        default=0,
+        sa_column=Column(Double, nullable=False, default=0, server_default="0"),
+    )
     created_at: datetime = Field(sa_column=Column(ms.TIMESTAMP, default=datetime.now))
-    updated_at: datetime = Field(sa_column=Column(ms.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(ms.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
     user: Optional["User"] = Relationship(back_populates="books")
     reviews: List["Review"] = Relationship(
         back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
@@ -73,6 +99,10 @@ class Book(SQLModel, table=True):
 
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # per-book listing: WHERE book_uid = ? ORDER BY created_at DESC, uid DESC
+        Index("ix_reviews_book_uid_created_at_uid", "book_uid", "created_at", "uid"),
+    )
 
     uid: str = Field(
         sa_column=Column(
@@ -84,10 +114,12 @@ class Review(SQLModel, table=True):
     )
     rating: float = Field(gt=0, le=5)
     review_text: str
-    user_uid: Optional[str] = Field(default=None, foreign_key="users.uid")
+    user_uid: Optional[str] = Field(default=None, foreign_key="users.uid", index=True)
     book_uid: Optional[str] = Field(default=None, foreign_key="books.uid")
     created_at: datetime = Field(sa_column=Column(ms.TIMESTAMP, default=datetime.now))
-    updated_at: datetime = Field(sa_column=Column(ms.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(ms.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
     user: Optional["User"] = Relationship(back_populates="reviews")
     book: Optional["Book"] = Relationship(back_populates="reviews")
 
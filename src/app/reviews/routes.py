@@ -1,34 +1,99 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.app.db.database import get_session
-from src.app.models.models import User
-from src.app.auth.dependecies import get_current_user, RoleChecker
-from .schemas import CreateReviewModel
-from .service import ReviewService
+from typing import Optional
+from src.app.db.database import get_session, get_read_session, reads_from_replica
+from src.app.auth.schemas import UserPrincipal
+from src.app.auth.dependecies import get_current_user, RoleChecker, AccessTokenBearer
+from src.app.utils.config import Config
+from .schemas import CreateReviewModel, ReviewPage
+from src.app.utils.etag import (
+    make_etag,
+    is_not_modified,
+    not_modified_response,
+    validator_headers,
+)
+from .service import ReviewService, review_list_version
 
 
 router = APIRouter()
 
 review_service = ReviewService()
+access_token_bearer = AccessTokenBearer()
 admin_role_checker = Depends(RoleChecker(["admin"]))
 user_role_checker = Depends(RoleChecker(["user", "admin"]))
+read_role_checker = Depends(RoleChecker(["user", "admin"], stateless=True))
+
+
+@router.get("/", dependencies=[read_role_checker])
+async def get_all_reviews(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
+    version = await review_list_version.current()
+
+    if version and not reads_from_replica(session):
+        etag = make_etag(version)
 
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        response.headers.update(validator_headers(etag))
 
-@router.get("/", dependencies=[user_role_checker])
-async def get_all_reviews(session: AsyncSession = Depends(get_session)):
     reviews = await review_service.get_all_reviews(session)
     return reviews
 
 
+@router.get("/export", dependencies=[admin_role_checker])
+async def export_reviews():
+    return StreamingResponse(
+        review_service.export_reviews(), media_type="application/x-ndjson"
+    )
+
+
+@router.get(
+    "/book/{book_uid}", response_model=ReviewPage, dependencies=[read_role_checker]
+)
+async def get_book_reviews(
+    book_uid: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    min_rating: Optional[float] = Query(default=None, gt=0, le=5),
+    max_rating: Optional[float] = Query(default=None, gt=0, le=5),
+    session: AsyncSession = Depends(get_read_session),
+):
+    version = await review_list_version.current()
+
+    if version and not reads_from_replica(session):
+        etag = make_etag(version, book_uid, limit, cursor, min_rating, max_rating)
+
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        response.headers.update(validator_headers(etag))
+
+    return await review_service.get_book_reviews(
+        book_uid,
+        session,
+        limit=limit,
+        cursor=cursor,
+        min_rating=min_rating,
+        max_rating=max_rating,
+    )
+
+
 @router.post("/book/{book_uid}", status_code=status.HTTP_201_CREATED)
 async def add_review_to_book(
     book_uid: str,
     review_data: CreateReviewModel,
-    current_user: User = Depends(get_current_user),
+    token_details: dict = Depends(access_token_bearer),
     session: AsyncSession = Depends(get_session),
 ):
     new_review = await review_service.add_review(
-        user_email=current_user.email,
+        user_uid=token_details["user"]["user_uid"],
         book_uid=book_uid,
         review_data=review_data,
         session=session,
@@ -44,11 +109,11 @@ async def add_review_to_book(
 )
 async def delete_review(
     review_uid: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
     await review_service.delete_review_from_book(
-        review_uid=review_uid, user_email=current_user.email, session=session
+        review_uid=review_uid, user_uid=current_user.uid, session=session
     )
 
     return 
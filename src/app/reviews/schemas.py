@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class ReviewModel(BaseModel):
@@ -16,3 +16,8 @@ class ReviewModel(BaseModel):
 class CreateReviewModel(BaseModel):
     rating: float = Field(gt=0, le=5)
     review_text: str
+
+
+class ReviewPage(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str] = None
@@ -1,82 +1,138 @@
 import logging
 from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
 from fastapi import status
 from fastapi.exceptions import HTTPException
 from sqlmodel import select, desc
-from src.app.auth.service import UserService
-from src.app.books.service import BookService
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import raiseload
+from src.app.books.service import (
+    BookService,
+    book_cache,
+    book_list_version,
+    review_list_version,
+)
+from src.app.books.trending import TrendingService
 from src.app.models.models import Review
+from src.app.db.database import engine
+from src.app.utils.bulk import to_ndjson
+from src.app.utils.config import Config
+from src.app.utils.errors import BookNotFound, UserNotFound
+from src.app.utils.pagination import keyset_after, build_page
 from .schemas import CreateReviewModel
 
 book_service = BookService()
-user_service = UserService()
+trending_service = TrendingService()
+
+REVIEW_BY_UID = select(Review).where(Review.uid == bindparam("review_uid"))
 
 
 class ReviewService:
 
     async def add_review(
         self,
-        user_email: str,
+        user_uid: str,
         book_uid: str,
         review_data: CreateReviewModel,
         session: AsyncSession,
     ):
-        try:
-            book = await book_service.get_book(book_uid=book_uid, session=session)
-            user = await user_service.get_user_by_email(
-                email=user_email, session=session
-            )
-
-            review_data_dict = review_data.model_dump()
-            new_review = Review(**review_data_dict)
+        """
+        Insert a review for the user named in the access token without
+        loading the book or the user: the aggregate UPDATE doubles as the
+        book existence check and the users FK guards the insert.
+        """
+        new_review = Review(
+            **review_data.model_dump(), user_uid=user_uid, book_uid=book_uid
+        )
 
-            if not book:
-                raise HTTPException(
-                    detail="Book not found", status_code=status.HTTP_404_NOT_FOUND
-                )
+        updated = await book_service.adjust_rating_aggregates(
+            book_uid, 1, new_review.rating, session
+        )
 
-            if not user:
-                raise HTTPException(
-                    detail="User not found", status_code=status.HTTP_404_NOT_FOUND
-                )
+        if not updated:
+            await session.rollback()
+            raise BookNotFound()
 
-            new_review.user = user
-            new_review.book = book
+        session.add(new_review)
 
-            session.add(new_review)
+        try:
             await session.commit()
 
-            return new_review
+        except IntegrityError as e:
+            # the user behind a still-valid token no longer exists
+            logging.warning("review insert rejected: %s", e.orig)
+            await session.rollback()
+            raise UserNotFound()
 
-        except Exception as e:
-            logging.exception(e)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Oops ... something went wrong!",
-            )
+        await book_cache.invalidate(book_uid)
+        await book_list_version.bump()
+        await review_list_version.bump()
+        await trending_service.record_review(book_uid, new_review.rating)
 
-    async def get_review(self, review_uid: str, session: AsyncSession):
-        statement = select(Review).where(Review.uid == review_uid)
+        return new_review
 
-        result = await session.exec(statement)
+    async def get_review(self, review_uid: str, session: AsyncSession):
+        result = await session.exec(REVIEW_BY_UID, params={"review_uid": review_uid})
 
         return result.first()
 
     async def get_all_reviews(self, session: AsyncSession):
-        statement = select(Review).order_by(desc(Review.created_at))
+        statement = (
+            select(Review).options(raiseload("*")).order_by(desc(Review.created_at))
+        )
 
         result = await session.exec(statement)
 
         return result.all()
 
-    async def delete_review_from_book(
-        self, review_uid: str, user_email: str, session: AsyncSession
+    async def get_book_reviews(
+        self,
+        book_uid: str,
+        session: AsyncSession,
+        limit: int = Config.DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        min_rating: Optional[float] = None,
+        max_rating: Optional[float] = None,
     ):
-        user = await user_service.get_user_by_email(user_email, session)
+        statement = (
+            select(Review)
+            .options(raiseload("*"))
+            .where(Review.book_uid == book_uid)
+            .order_by(desc(Review.created_at), desc(Review.uid))
+            .limit(limit + 1)
+        )
+
+        if min_rating is not None:
+            statement = statement.where(Review.rating >= min_rating)
+
+        if max_rating is not None:
+            statement = statement.where(Review.rating <= max_rating)
+
+        if cursor:
+            statement = statement.where(
+                keyset_after(Review.created_at, Review.uid, cursor)
+            )
+
+        result = await session.exec(statement)
+
+        return build_page(result.all(), limit)
+
+    async def export_reviews(self, chunk_size: int = Config.EXPORT_CHUNK_SIZE):
+        statement = Review.__table__.select().execution_options(yield_per=chunk_size)
+
+        async with engine.connect() as conn:
+            result = await conn.stream(statement)
+
+            async for rows in result.mappings().partitions():
+                yield to_ndjson(rows)
 
+    async def delete_review_from_book(
+        self, review_uid: str, user_uid: str, session: AsyncSession
+    ):
         review = await self.get_review(review_uid, session)
 
-        if not review or (review.user != user):
+        if not review or review.user_uid != user_uid:
             raise HTTPException(
                 detail="Cannot delete this review",
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -84,4 +140,18 @@ class ReviewService:
 
         await session.delete(review)
 
+        if review.book_uid:
+            await book_service.adjust_rating_aggregates(
+                review.book_uid, -1, -review.rating, session
+            )
+
         await session.commit()
+
+        if review.book_uid:
+            await book_cache.invalidate(review.book_uid)
+            await book_list_version.bump()
+            await trending_service.remove_review(
+                review.book_uid, review.rating, review.created_at.timestamp()
+            )
+
+        await review_list_version.bump()
@@ -0,0 +1,8 @@
+def send_email_later(recipients: list[str], subject: str, body: str) -> None:
+    """
+    Queue the `send_email` Celery task. Celery, fastapi_mail and the SMTP
+    config are imported on the first call instead of at app startup.
+    """
+    from src.app.utils.celery_tasks import send_email
+
+    send_email.delay(recipients, subject, body)
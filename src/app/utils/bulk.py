@@ -0,0 +1,117 @@
+import csv
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Iterable, Mapping, Tuple, Union
+
+# Incremental parsers for bulk request bodies. They consume the body as it
+# arrives (e.g. `request.stream()`) and yield `(line_number, row)` pairs,
+# where `row` is the parsed record or the exception explaining why the
+# line could not be parsed.
+
+
+def _decode(line: bytes) -> Union[str, UnicodeDecodeError]:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return e
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[Union[str, UnicodeDecodeError]]:
+    """
+    Lines of the body, decoded. A line that is not valid UTF-8 is yielded
+    as its `UnicodeDecodeError`, so one bad line doesn't end the stream.
+    """
+    buffer = b""
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            yield _decode(line)
+
+    if buffer:
+        yield _decode(buffer)
+
+
+async def iter_ndjson_rows(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[Tuple[int, Any]]:
+    line_no = 0
+
+    async for line in iter_lines(chunks):
+        line_no += 1
+
+        if isinstance(line, UnicodeDecodeError):
+            yield line_no, line
+            continue
+
+        if not line.strip():
+            continue
+
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+
+async def iter_csv_rows(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    CSV with a header row. Quoted fields may span lines: a record is only
+    parsed once its double quotes are balanced.
+    """
+    header = None
+    record = ""
+    record_line = line_no = 0
+
+    async for line in iter_lines(chunks):
+        line_no += 1
+
+        if isinstance(line, UnicodeDecodeError):
+            # drops the record it was part of
+            yield record_line if record else line_no, line
+            record = ""
+            continue
+
+        if not record and not line.strip():
+            continue
+
+        if not record:
+            record_line = line_no
+            record = line
+        else:
+            record = f"{record}\n{line}"
+
+        if record.count('"') % 2:
+            continue
+
+        fields, record = next(csv.reader([record])), ""
+
+        if header is None:
+            header = [name.strip() for name in fields]
+        elif len(fields) != len(header):
+            yield record_line, ValueError(
+                f"expected {len(header)} fields, got {len(fields)}"
+            )
+        else:
+            yield record_line, dict(zip(header, fields))
+
+    if record:
+        yield record_line, ValueError("unterminated quoted field")
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_ndjson(rows: Iterable[Mapping]) -> str:
+    return "".join(
+        json.dumps(dict(row), default=_json_default) + "\n" for row in rows
+    )
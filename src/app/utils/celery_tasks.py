@@ -1,6 +1,11 @@
 from celery import Celery
 from src.app.utils.mail import mail, create_message
 from asgiref.sync import async_to_sync
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.app.books.service import BookService
+from src.app.utils.config import Config
 
 app = Celery()
 
@@ -17,5 +22,29 @@ def send_email(recipients: list[str], subject: str, body: str):
     print("Email sent")
 
 
+async def _reconcile_book_ratings() -> int:
+    # a throwaway engine: the app's pooled connections belong to the API's
+    # event loop, while every task runs on its own loop
+    engine = create_async_engine(Config.DATABASE_URL, poolclass=NullPool)
+
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            drifted = await BookService().reconcile_rating_aggregates(session)
+
+        return len(drifted)
+
+    finally:
+        await engine.dispose()
+
+
+@app.task()
+def reconcile_book_ratings():
+
+    repaired = async_to_sync(_reconcile_book_ratings)()
+
+    print(f"Rating aggregates repaired for {repaired} books")
+
+
 # To Run Celery: `celery -A src.app.utils.celery_tasks worker -P solo -l info -E` [On windows]
 # Flower: `celery -A src.app.utils.celery_tasks flower --port=5555`
+# Beat (scheduled reconciliation): `celery -A src.app.utils.celery_tasks beat -l info`
@@ -1,8 +1,20 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DATABASE_REPLICA_URL: Optional[str] = None
+    REPLICA_STICKY_SECONDS: int = 5
+    REPLICA_RETRY_SECONDS: int = 30
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
     JWT_SECRET: str
     JWT_ALGORITHM: str
     REDIS_URL: str
@@ -18,6 +30,40 @@ class Settings(BaseSettings):
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
     DOMAIN: str
+    # "production" trusts Alembic migrations and skips `create_all` at boot
+    ENVIRONMENT: str = "development"
+    # adds X-DB-Query-Count / X-DB-Time-ms to every response
+    DEBUG: bool = False
+    N_PLUS_ONE_THRESHOLD: int = 5
+    TOKEN_CACHE_SIZE: int = 10_000
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    STATELESS_AUTH: bool = False
+    STATELESS_ACCESS_TOKEN_EXPIRY: int = 300
+    BLOCKLIST_HEARTBEAT: float = 1.0
+    BLOCKLIST_MAX_STALENESS: float = 5.0
+    RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT: str = "20/minute"
+    LOGIN_EMAIL_RATE_LIMIT: str = "5/minute"
+    SIGNUP_RATE_LIMIT: str = "5/minute"
+    SEND_MAIL_RATE_LIMIT: str = "3/minute"
+    PASSWORD_RESET_RATE_LIMIT: str = "10/minute"
+    PASSWORD_RESET_EMAIL_RATE_LIMIT: str = "3/minute"
+    DEFAULT_PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
+    CACHE_BACKEND: str = "redis"  # "redis" or "memory"
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LOCAL_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+    PRINCIPAL_CACHE_TTL: int = 300
+    PRINCIPAL_LOCAL_TTL: int = 5
+    BOOK_CACHE_TTL: int = 300
+    BOOK_DETAIL_REVIEWS_LIMIT: int = 10
+    BOOK_IMPORT_BATCH_SIZE: int = 1000
+    EXPORT_CHUNK_SIZE: int = 1000
+    RATING_RECONCILE_INTERVAL: int = 3600
+    TRENDING_WINDOW_HOURS: int = 24
+    TRENDING_REFRESH_SECONDS: int = 60
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -27,3 +73,9 @@ Config = Settings()
 broker_url = Config.REDIS_URL
 result_backend = Config.REDIS_URL
 broker_connection_retry_on_startup = True
+beat_schedule = {
+    "reconcile-book-ratings": {
+        "task": "src.app.utils.celery_tasks.reconcile_book_ratings",
+        "schedule": Config.RATING_RECONCILE_INTERVAL,
+    },
+}
@@ -77,6 +77,18 @@ class UserNotFound(BooklyException):
     pass
 
 
+class InvalidCursor(BooklyException):
+    """User has provided a pagination cursor that cannot be decoded"""
+
+    pass
+
+
+class PasswordHasherBusy(BooklyException):
+    """Too many password hashes are already queued on this worker"""
+
+    pass
+
+
 class AccountNotVerified(Exception):
     """Account not yet verified"""
 
@@ -232,6 +244,29 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "invalid_cursor",
+                "resolution": "Use the next_cursor value returned by the previous page",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        PasswordHasherBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "The server is busy, please try again shortly",
+                "error_code": "server_busy",
+            },
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exc):
 
@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Optional
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+    return f'"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    return formatdate(value.timestamp(), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    # `no-cache` lets clients keep the body but makes them revalidate
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    return headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Evaluate `If-None-Match` (which wins when present) and then
+    `If-Modified-Since` against the current validators.
+    """
+    if_none_match = request.headers.get("if-none-match")
+
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+        return int(last_modified.timestamp()) <= int(since.timestamp())
+
+    return False
+
+
+def not_modified_response(
+    etag: str, last_modified: Optional[datetime] = None
+) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, last_modified),
+    )
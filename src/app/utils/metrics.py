@@ -0,0 +1,37 @@
+from collections import defaultdict
+from typing import Callable, Dict
+
+# Process-local metrics. Every worker keeps its own numbers; scrape each
+# worker (or aggregate in your metrics pipeline) for a full picture.
+
+counters: Dict[str, int] = defaultdict(int)
+timings: Dict[str, dict] = {}
+gauges: Dict[str, Callable[[], float]] = {}
+
+
+def incr(name: str, value: int = 1) -> None:
+    counters[name] += value
+
+
+def observe(name: str, seconds: float) -> None:
+    timing = timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+
+    timing["count"] += 1
+    timing["total"] += seconds
+    timing["max"] = max(timing["max"], seconds)
+
+
+def register_gauge(name: str, func: Callable[[], float]) -> None:
+    gauges[name] = func
+
+
+def snapshot() -> dict:
+    return {
+        "counters": dict(counters),
+        "timings": {
+            name: {**timing, "avg": timing["total"] / timing["count"]}
+            for name, timing in timings.items()
+            if timing["count"]
+        },
+        "gauges": {name: func() for name, func in gauges.items()},
+    }
@@ -3,6 +3,9 @@ from fastapi.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
 import time
 import logging
+from src.app.db.database import mark_recent_write
+from src.app.db.instrumentation import track_request, report_repeated_statements
+from src.app.utils.config import Config
 
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True
@@ -13,11 +16,26 @@ def register_middleware(app: FastAPI):
     @app.middleware("http")
     async def custom_logging(request: Request, call_next):
         start_time = time.time()
+        db_stats = track_request()
 
         response = await call_next(request)
+
+        if response.status_code < 400:
+            await mark_recent_write(request)
+
+        report_repeated_statements(db_stats, f"{request.method} {request.url.path}")
+
+        if Config.DEBUG:
+            response.headers["X-DB-Query-Count"] = str(db_stats.queries)
+            response.headers["X-DB-Time-ms"] = f"{db_stats.query_seconds * 1000:.1f}"
+
         processing_time = time.time() - start_time
 
         message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - {response.status_code} completed after {processing_time}s"
+        message += (
+            f" - {db_stats.queries} queries in {db_stats.query_seconds:.4f}s,"
+            f" {db_stats.checkouts} db checkouts held {db_stats.hold_seconds:.4f}s"
+        )
 
         print(message)
         return response
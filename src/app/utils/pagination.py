@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+from src.app.utils.errors import InvalidCursor
+
+
+def encode_cursor(value: Any, uid: str) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+
+    raw = json.dumps([value, uid], separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, parse: Callable[[Any], Any] = datetime.fromisoformat
+) -> Tuple[Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, uid = json.loads(base64.urlsafe_b64decode(padded))
+
+        return parse(value), str(uid)
+
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor() from e
+
+
+def keyset_after(
+    sort_column: Any,
+    uid_column: Any,
+    cursor: str,
+    parse: Callable[[Any], Any] = datetime.fromisoformat,
+):
+    """
+    WHERE clause selecting the rows that come after `cursor` in a
+    `ORDER BY sort_column DESC, uid_column DESC` listing. `parse` turns the
+    JSON sort value back into the column's type.
+    """
+    value, uid = decode_cursor(cursor, parse)
+
+    return or_(sort_column < value, and_(sort_column == value, uid_column < uid))
+
+
+def build_page(
+    rows: Sequence[Any],
+    limit: int,
+    key: Optional[Callable[[Any], Tuple[Any, str]]] = None,
+) -> dict:
+    """
+    Turn the `limit + 1` rows fetched by a keyset query into a page.
+    The extra row only tells us whether a next page exists.
+    """
+    key = key or (lambda row: (row.created_at, row.uid))
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(*key(items[-1])) if len(rows) > limit else None
+
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,34 @@
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+# What `PasswordHasher`'s worker processes run. A spawned worker imports
+# the module of each function it is sent, so this one only needs passlib:
+# not the settings, and not FastAPI through `security`.
+
+password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def configure(rounds: int) -> None:
+    # hashes made with any other cost are reported by `verify_and_update`, so
+    # a changed BCRYPT_ROUNDS is rolled out as users log in
+    password_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def generate_password_hash(password: str) -> str:
+    return password_context.hash(password)
+
+
+def verify_password(password: str, hash: str) -> bool:
+    return password_context.verify(password, hash)
+
+
+def verify_and_update_password(password: str, hash: str) -> Tuple[bool, Optional[str]]:
+    return password_context.verify_and_update(password, hash)
+
+
+def load_password_backend() -> None:
+    password_context.handler().get_backend()
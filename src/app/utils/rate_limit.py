@@ -0,0 +1,169 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
+from src.app.db.redis import redis_client
+from src.app.utils.config import Config
+from src.app.utils.metrics import incr
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# KEYS[1] = bucket, ARGV = capacity, refill rate (tokens per second).
+# Uses the server clock so every app worker sees the same time.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate))
+return {allowed, tostring(retry_after)}
+"""
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """`"10/minute"` -> `(10, 60)`: at most 10 calls per 60 seconds."""
+    count, _, period = rate.partition("/")
+
+    return int(count), PERIODS[period.strip()]
+
+
+class MemoryTokenBuckets:
+    """In-process buckets, for CACHE_BACKEND=memory and when Redis fails."""
+
+    def __init__(self, max_keys: int = 10_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, capacity: int, rate: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, ts = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - ts) * rate)
+
+        allowed = tokens >= 1
+        retry_after = 0.0 if allowed else (1 - tokens) / rate
+
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return allowed, retry_after
+
+
+class RedisTokenBuckets:
+    """Buckets shared by all workers, updated atomically by a Lua script."""
+
+    def __init__(self, client=redis_client):
+        self.script = client.register_script(TOKEN_BUCKET_LUA)
+
+    async def take(self, key: str, capacity: int, rate: float) -> Tuple[bool, float]:
+        allowed, retry_after = await self.script(keys=[key], args=[capacity, rate])
+
+        return bool(allowed), float(retry_after)
+
+
+memory_buckets = MemoryTokenBuckets()
+
+
+async def client_ip(request: Request) -> Optional[str]:
+    return request.client.host if request.client else None
+
+
+def body_field(name: str) -> Callable[[Request], Awaitable[Optional[str]]]:
+    """Key on a field of the JSON body, e.g. the email a login is for."""
+
+    async def key(request: Request) -> Optional[str]:
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+
+        value = body.get(name) if isinstance(body, dict) else None
+
+        return str(value).strip().lower() if value else None
+
+    return key
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limit as a route dependency:
+
+        limit = RateLimiter("login", "10/minute")
+
+        @router.post("/login", dependencies=[Depends(limit)])
+
+    Each identity returned by `key` (client IP by default) gets a bucket
+    of `count` tokens refilled over `period`; requests without an identity
+    are not limited. Rejected calls get a 429 with `Retry-After` before the
+    endpoint runs.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: str,
+        key: Callable[[Request], Awaitable[Optional[str]]] = client_ip,
+        backend=None,
+    ):
+        self.name = name
+        self.capacity, period = parse_rate(rate)
+        self.refill_rate = self.capacity / period
+        self.key = key
+        self.backend = backend or (
+            memory_buckets if Config.CACHE_BACKEND == "memory" else RedisTokenBuckets()
+        )
+
+    async def __call__(self, request: Request) -> None:
+        if not Config.RATE_LIMIT_ENABLED:
+            return
+
+        identity = await self.key(request)
+
+        if identity is None:
+            return
+
+        bucket = f"ratelimit:{self.name}:{identity}"
+
+        try:
+            allowed, retry_after = await self.backend.take(
+                bucket, self.capacity, self.refill_rate
+            )
+        except RedisError as e:
+            logging.warning("rate limiter falling back to memory: %s", e)
+            allowed, retry_after = await memory_buckets.take(
+                bucket, self.capacity, self.refill_rate
+            )
+
+        if allowed:
+            return
+
+        incr(f"rate_limit.{self.name}.rejected")
+
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "error": "Too many requests",
+                "resolution": "Please wait before trying again",
+            },
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
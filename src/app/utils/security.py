@@ -1,22 +1,128 @@
-from passlib.context import CryptContext
 from datetime import timedelta, datetime
 from itsdangerous import URLSafeTimedSerializer
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import multiprocessing
+import time
 import jwt
 import uuid
 import logging
 from .config import Config
+from .errors import PasswordHasherBusy
+from .metrics import incr, observe, register_gauge
+from .passwords import (
+    configure as configure_passwords,
+    generate_password_hash,
+    load_password_backend,
+    verify_and_update_password,
+)
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+configure_passwords(Config.BCRYPT_ROUNDS)
 
 ACCESS_TOKEN_EXPIRY = 3600
 
 
-def generate_password_hash(password: str) -> str:
-    return password_context.hash(password)
+class PasswordHasher:
+    """
+    Runs bcrypt in a process pool so a hash never blocks the event loop.
+
+    At most `max_pending` calls may be queued or running per worker; beyond
+    that `PasswordHasherBusy` is raised (503) instead of letting a login
+    storm pile up unbounded work. `start()` creates the pool and warms its
+    workers in the background; the app calls it on startup.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._warmup: Optional[asyncio.Task] = None
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_pending:
+            incr("password_hasher.rejected")
+            raise PasswordHasherBusy()
+
+        if self._executor is None:
+            self._create_executor()
+
+        self.pending += 1
+        start = time.perf_counter()
+
+        try:
+            loop = asyncio.get_running_loop()
+
+            return await loop.run_in_executor(self._executor, func, *args)
+
+        finally:
+            self.pending -= 1
+            observe("password_hasher.latency", time.perf_counter() - start)
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._create_executor()
+
+        # not awaited: spawning the workers takes longer than the rest of
+        # startup, and a login that arrives first just waits for a worker
+        if self._warmup is None:
+            self._warmup = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        # one job per worker starts every process and loads bcrypt in each,
+        # so the first logins don't pay for it
+        try:
+            await asyncio.gather(
+                *(
+                    loop.run_in_executor(self._executor, load_password_backend)
+                    for _ in range(self.workers)
+                )
+            )
+        except Exception as e:
+            logging.warning("password hasher warm-up failed: %s", e)
+
+    def _create_executor(self) -> None:
+        # spawned, not forked: a forked child would inherit the event loop,
+        # pooled DB/Redis sockets and locks held by other threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=configure_passwords,
+            initargs=(Config.BCRYPT_ROUNDS,),
+        )
+
+    def shutdown(self) -> None:
+        if self._warmup is not None:
+            self._warmup.cancel()
+            self._warmup = None
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+)
+register_gauge("password_hasher.pending", lambda: password_hasher.pending)
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.run(generate_password_hash, password)
 
 
-def verify_password(password: str, hash: str) -> bool:
-    return password_context.verify(password, hash)
+async def check_password(password: str, hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Returns whether `password` matches, plus a new hash when the stored one
+    was made with outdated cost parameters and should be replaced.
+    """
+    return await password_hasher.run(verify_and_update_password, password, hash)
 
 
 def create_access_token(
@@ -24,10 +130,18 @@ def create_access_token(
 ):
     payload = {}
 
+    if expiry is None:
+        # claims may be trusted without a database lookup in stateless
+        # mode, so keep them short-lived there
+        expiry = timedelta(
+            seconds=Config.STATELESS_ACCESS_TOKEN_EXPIRY
+            if Config.STATELESS_AUTH
+            else ACCESS_TOKEN_EXPIRY
+        )
+
     payload["user"] = user_data
-    payload["exp"] = datetime.now() + (
-        expiry if expiry else timedelta(seconds=ACCESS_TOKEN_EXPIRY)
-    )
+    payload["exp"] = datetime.now() + expiry
+    payload["iat"] = time.time()
     payload["jti"] = str(uuid.uuid4())
     payload["refresh"] = refresh
 
@@ -38,15 +152,70 @@ def create_access_token(
     return token
 
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU of claims whose signature has already been verified, keyed
+    by a digest of the token. An entry is dropped once the token's `exp`
+    passes, so a cached token never outlives what `jwt.decode` would
+    accept. Cached claims are shared: treat them as read-only.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._claims: "OrderedDict[str, dict]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        claims = self._claims.get(key)
+
+        if claims is None:
+            return None
+
+        if claims["exp"] <= time.time():
+            del self._claims[key]
+            return None
+
+        self._claims.move_to_end(key)
+
+        return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        if "exp" not in claims:
+            return
+
+        self._claims[self._key(token)] = claims
+        self._claims.move_to_end(self._key(token))
+
+        while len(self._claims) > self.max_size:
+            self._claims.popitem(last=False)
+
+
+verified_tokens = VerifiedTokenCache(max_size=Config.TOKEN_CACHE_SIZE)
+
+
 def decode_token(token: str) -> dict:
+    token_data = verified_tokens.get(token)
+
+    if token_data is not None:
+        incr("token_cache.hits")
+        return token_data
+
+    incr("token_cache.misses")
+
     try:
         token_data = jwt.decode(
             jwt=token, key=Config.JWT_SECRET, algorithms=[Config.JWT_ALGORITHM]
         )
 
+        verified_tokens.put(token, token_data)
+
         return token_data
 
-    except jwt.PyJWKError as e:
+    except jwt.PyJWTError as e:
         logging.exception(e)
         return None
 
@@ -0,0 +1,123 @@
+"""
+Shared fixtures. The app reads its settings at import time, so the test
+environment is set up here, before any test module imports it: a
+throwaway SQLite database, the in-process cache and no read replica.
+"""
+
+import os
+import tempfile
+
+DATABASE_FILE = os.path.join(tempfile.mkdtemp(prefix="bookly-tests-"), "test.db")
+
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DATABASE_FILE}"
+os.environ["DATABASE_REPLICA_URL"] = ""
+os.environ["CACHE_BACKEND"] = "memory"
+
+for name, value in {
+    "JWT_SECRET": "test-only-secret-of-at-least-32-bytes",
+    "JWT_ALGORITHM": "HS256",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "bookly@example.com",
+    "MAIL_PORT": "587",
+    "MAIL_SERVER": "localhost",
+    "MAIL_FROM_NAME": "Bookly",
+    "DOMAIN": "localhost",
+}.items():
+    os.environ.setdefault(name, value)
+
+import uuid  # noqa: E402
+from contextlib import contextmanager  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+from src.app.db.database import Session, engine  # noqa: E402
+from src.app.db.instrumentation import query_budget  # noqa: E402
+from src.app.db.redis import blocklist_mirror  # noqa: E402
+from src.app.main import app  # noqa: E402
+from src.app.models.models import User  # noqa: E402
+from src.app.utils.config import Config  # noqa: E402
+from src.app.utils.security import create_access_token  # noqa: E402
+
+
+@pytest_asyncio.fixture
+async def session():
+    """A session on a freshly created schema."""
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    try:
+        async with Session() as session:
+            yield session
+
+    finally:
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def user(session):
+    """A verified user, with an email no earlier test has cached."""
+    user = User(
+        uid=str(uuid.uuid4()),
+        username="reader",
+        email=f"reader-{uuid.uuid4().hex}@example.com",
+        first_name="Rea",
+        last_name="Der",
+        password_hash="-",
+        is_verified=True,
+    )
+    session.add(user)
+    await session.commit()
+
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    """An access token for `user`, with the claims login puts in it."""
+    token = create_access_token(
+        user_data={
+            "email": user.email,
+            "user_uid": str(user.uid),
+            "role": user.role,
+            "is_verified": user.is_verified,
+        }
+    )
+
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest_asyncio.fixture
+async def client(session, monkeypatch):
+    """
+    The app over ASGI, without its lifespan. There is no Redis to mirror
+    the token blocklist from, so the (empty) mirror is taken as current.
+    """
+    monkeypatch.setattr(blocklist_mirror, "is_fresh", lambda: True)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def max_queries():
+    """
+    `with max_queries(n):` fails the test when the block runs more than `n`
+    statements, or any one statement N_PLUS_ONE_THRESHOLD times or more.
+    """
+
+    @contextmanager
+    def budget(count: int):
+        with query_budget(count) as stats:
+            yield stats
+
+        repeated = stats.repeated_statements(Config.N_PLUS_ONE_THRESHOLD)
+
+        assert not repeated, f"possible N+1: {repeated}"
+
+    return budget
@@ -0,0 +1,81 @@
+import logging
+import uuid
+from datetime import date
+
+import pytest
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.app.db.instrumentation import report_repeated_statements, track_request
+from src.app.models.models import Book, Review, User
+from src.app.utils.config import Config
+
+BOOKS = 10
+
+
+async def seed_books(user: User, session: AsyncSession) -> list:
+    books = [
+        Book(
+            uid=str(uuid.uuid4()),
+            title=f"Book {n}",
+            author="Author",
+            publisher="Publisher",
+            published_date=date.today(),
+            page_count=100,
+            language="en",
+            user_uid=user.uid,
+        )
+        for n in range(BOOKS)
+    ]
+    reviews = [
+        Review(rating=4, review_text="-", user_uid=user.uid, book_uid=book.uid)
+        for book in books
+    ]
+    session.add_all(books + reviews)
+    await session.commit()
+
+    return books
+
+
+@pytest.mark.asyncio
+async def test_list_books_within_budget(
+    client, session, user, auth_headers, max_queries
+):
+    await seed_books(user, session)
+
+    # the principal lookup, then one page of books
+    with max_queries(2):
+        response = await client.get("/api/v1/books/", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == BOOKS
+
+
+@pytest.mark.asyncio
+async def test_me_within_budget(client, session, user, auth_headers, max_queries):
+    await seed_books(user, session)
+
+    # the principal lookup, then the user and one query each for their
+    # books and reviews, however many there are
+    with max_queries(4):
+        response = await client.get("/api/v1/auth/me", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.json()["books"]) == BOOKS
+
+
+@pytest.mark.asyncio
+async def test_per_row_lookups_are_reported(session, user, caplog, max_queries):
+    books = await seed_books(user, session)
+    stats = track_request()
+
+    for book in books[: Config.N_PLUS_ONE_THRESHOLD]:
+        await session.exec(select(Book).where(Book.uid == book.uid))
+
+    with caplog.at_level(logging.WARNING):
+        report_repeated_statements(stats, "test")
+
+    assert "possible N+1 in test" in caplog.text
+
+    with pytest.raises(AssertionError, match=r"possible N\+1"), max_queries(BOOKS):
+        for book in books[: Config.N_PLUS_ONE_THRESHOLD]:
+            await session.exec(select(Book).where(Book.uid == book.uid))
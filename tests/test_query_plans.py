@@ -0,0 +1,214 @@
+"""
+Query-plan regression tests for the service layer.
+
+Run against a migrated database (e.g. after `alembic upgrade head`):
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... pytest tests/test_query_plans.py
+
+Each test seeds one user, book and review inside a transaction, runs one
+hot read path of the services, captures every SELECT it issues (including
+relationship loads) and EXPLAINs it. It fails when a plan scans a whole
+table that no index could have helped with. The transaction is rolled
+back, so nothing is left behind.
+
+Deliberately not checked, as they read or rank every row: GET /reviews,
+the exports and the SQL fallback of the trending ranking.
+"""
+
+import os
+import uuid
+from datetime import date, datetime
+from typing import List
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+import pytest_asyncio  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+from src.app.auth.service import UserService  # noqa: E402
+from src.app.books.service import BookService  # noqa: E402
+from src.app.db.database import make_engine  # noqa: E402
+from src.app.models.models import Book, Review, User  # noqa: E402
+from src.app.reviews.service import ReviewService  # noqa: E402
+from src.app.utils.pagination import encode_cursor  # noqa: E402
+
+USER_UID = str(uuid.uuid4())
+BOOK_UID = str(uuid.uuid4())
+REVIEW_UID = str(uuid.uuid4())
+EMAIL = f"explain-{USER_UID}@example.com"
+NEWEST = encode_cursor(datetime.now(), BOOK_UID)
+TOP_RATED = encode_cursor(5.0, BOOK_UID)
+
+# dialects with a plan check, and how each asks for a plan
+EXPLAIN = {
+    "mysql": "EXPLAIN ",
+    "postgresql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+
+user_service = UserService()
+book_service = BookService()
+review_service = ReviewService()
+
+CHECKS = [
+    pytest.param(
+        lambda s: user_service.get_user_by_email(EMAIL, s), id="users.by_email"
+    ),
+    pytest.param(lambda s: user_service.get_user_books(EMAIL, s), id="users.books"),
+    pytest.param(lambda s: book_service.get_all_book(s), id="books.list"),
+    pytest.param(
+        lambda s: book_service.get_all_book(s, cursor=NEWEST), id="books.list.cursor"
+    ),
+    pytest.param(
+        lambda s: book_service.get_all_book(s, sort="reviews"), id="books.list.reviews"
+    ),
+    pytest.param(
+        lambda s: book_service.get_all_book(s, sort="rating"), id="books.list.rating"
+    ),
+    pytest.param(
+        lambda s: book_service.get_all_book(s, cursor=TOP_RATED, sort="rating"),
+        id="books.list.rating.cursor",
+    ),
+    pytest.param(lambda s: book_service.get_user_book(USER_UID, s), id="books.mine"),
+    pytest.param(
+        lambda s: book_service.get_user_book(USER_UID, s, cursor=NEWEST),
+        id="books.mine.cursor",
+    ),
+    pytest.param(lambda s: book_service.get_book(BOOK_UID, s), id="books.by_uid"),
+    pytest.param(
+        lambda s: book_service.get_books_by_uids([BOOK_UID], s), id="books.by_uids"
+    ),
+    pytest.param(
+        lambda s: review_service.get_review(REVIEW_UID, s), id="reviews.by_uid"
+    ),
+    pytest.param(
+        lambda s: review_service.get_book_reviews(BOOK_UID, s), id="reviews.book"
+    ),
+    pytest.param(
+        lambda s: review_service.get_book_reviews(
+            BOOK_UID, s, cursor=NEWEST, min_rating=3
+        ),
+        id="reviews.book.filtered",
+    ),
+]
+
+
+def seed(session: AsyncSession) -> None:
+    session.add(
+        User(
+            uid=USER_UID,
+            username="explain",
+            email=EMAIL,
+            first_name="Query",
+            last_name="Plan",
+            password_hash="-",
+        )
+    )
+    session.add(
+        Book(
+            uid=BOOK_UID,
+            title="Query Plans",
+            author="Explain",
+            publisher="Explain",
+            published_date=date.today(),
+            page_count=1,
+            language="en",
+            user_uid=USER_UID,
+        )
+    )
+    session.add(
+        Review(
+            uid=REVIEW_UID,
+            rating=4,
+            review_text="-",
+            user_uid=USER_UID,
+            book_uid=BOOK_UID,
+        )
+    )
+
+
+def full_scans(dialect: str, plan: list) -> List[str]:
+    """Describe the steps of an EXPLAIN result that scan a whole table."""
+    if dialect == "mysql":
+        # `ALL` alone may just mean the table is tiny; no candidate key
+        # means there was nothing better to choose
+        return [
+            f"full scan of {row.table}"
+            for row in plan
+            if row.type == "ALL" and not row.possible_keys
+        ]
+
+    if dialect == "postgresql":
+        # run with enable_seqscan=off, so a Seq Scan means no usable index
+        return [row[0].strip() for row in plan if "Seq Scan" in row[0]]
+
+    return [
+        row.detail
+        for row in plan
+        if row.detail.startswith("SCAN ") and " USING " not in row.detail
+    ]
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = make_engine(TEST_DATABASE_URL)
+
+    try:
+        if engine.dialect.name not in EXPLAIN:
+            pytest.skip(f"no plan check for {engine.dialect.name}")
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            if engine.dialect.name == "postgresql":
+                await session.exec(text("SET LOCAL enable_seqscan = off"))
+
+            seed(session)
+            await session.flush()
+
+            # start from an empty identity map, so the check issues its
+            # queries instead of finding the seeded objects
+            session.expunge_all()
+
+            yield session
+
+            await session.rollback()
+
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("check", CHECKS)
+async def test_no_full_table_scans(session: AsyncSession, check):
+    dialect = session.bind.dialect.name
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(session.bind.sync_engine, "before_cursor_execute", capture)
+
+    try:
+        await check(session)
+    finally:
+        event.remove(session.bind.sync_engine, "before_cursor_execute", capture)
+
+    assert captured, "the check issued no SELECT"
+
+    conn = await session.connection()
+    problems = []
+
+    for statement, parameters in captured:
+        result = await conn.exec_driver_sql(EXPLAIN[dialect] + statement, parameters)
+
+        problems += [
+            f"{problem}\n  in: {' '.join(statement.split())}"
+            for problem in full_scans(dialect, result.all())
+        ]
+
+    assert not problems, "\n".join(problems)
@@ -0,0 +1,84 @@
+import uuid
+from datetime import date
+
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.app.books.service import BookService
+from src.app.models.models import Book, User
+from src.app.reviews.schemas import CreateReviewModel
+from src.app.reviews.service import ReviewService
+
+book_service = BookService()
+review_service = ReviewService()
+
+# adding all of these and then subtracting 4.3 and 3.7 leaves 7.999...,
+# where a fresh SUM() over the rest gives 8.0
+RATINGS = [4.3, 0.1, 0.2, 3.7, 2.9, 4.1, 0.7]
+DELETED = [4.3, 3.7]
+
+
+async def seed(session: AsyncSession) -> Book:
+    user = User(
+        uid=str(uuid.uuid4()),
+        username="reader",
+        email="reader@example.com",
+        first_name="Rea",
+        last_name="Der",
+        password_hash="-",
+    )
+    book = Book(
+        uid=str(uuid.uuid4()),
+        title="Rounding",
+        author="IEEE",
+        publisher="754",
+        published_date=date.today(),
+        page_count=1,
+        language="en",
+        user_uid=user.uid,
+    )
+    session.add_all([user, book])
+    await session.commit()
+
+    return book
+
+
+@pytest.mark.asyncio
+async def test_reconcile_is_a_no_op_after_adds_and_deletes(session: AsyncSession):
+    book = await seed(session)
+    reviews = [
+        await review_service.add_review(
+            book.user_uid,
+            book.uid,
+            CreateReviewModel(rating=rating, review_text="-"),
+            session,
+        )
+        for rating in RATINGS
+    ]
+
+    for review in reviews:
+        if review.rating in DELETED:
+            await review_service.delete_review_from_book(
+                review.uid, book.user_uid, session
+            )
+
+    assert await book_service.reconcile_rating_aggregates(session) == []
+
+    await session.refresh(book)
+    assert book.review_count == len(RATINGS) - len(DELETED)
+    assert book.average_rating == pytest.approx(8 / book.review_count)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drifted_aggregates(session: AsyncSession):
+    book = await seed(session)
+    await review_service.add_review(
+        book.user_uid, book.uid, CreateReviewModel(rating=4, review_text="-"), session
+    )
+
+    await book_service.adjust_rating_aggregates(book.uid, 1, 1, session)
+    await session.commit()
+
+    assert await book_service.reconcile_rating_aggregates(session) == [book.uid]
+
+    await session.refresh(book)
+    assert (book.review_count, book.rating_sum, book.average_rating) == (1, 4, 4)